@@ -2,9 +2,11 @@ import os
 
 import requests
 
+from app.core.metrics import timed
 from app.models.antifraud import AntifraudRequest
 
 
+@timed("antifraud", "validate")
 async def call_antifraud(request: AntifraudRequest):
     antifraud_address = os.getenv('ANTIFRAUD_ADDRESS', "localhost:9090")
     antifraud_url = f"http://{antifraud_address}/api/validate"
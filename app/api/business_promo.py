@@ -1,50 +1,53 @@
+import csv
+import io
+import json
 import uuid
 from typing import Optional, List
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, Security, Query
-from fastapi.responses import JSONResponse
-from sqlalchemy import desc, cast, func, or_
+from fastapi import APIRouter, Depends, Security, Query, Body, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import desc, cast, func, or_, insert
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
 from app.core import token
-from app.db.session import get_db
+from app.core.cache import cached, invalidate
+from app.core import etag as etags
+from app.core.config import settings
+from app.core.idempotency import idempotent
+from app.core.tasks import enqueue
+from app.core.streaming import StreamingJSONResponse, stream_rows, iter_ndjson, iter_csv
+from app.db.session import get_db, get_read_db, redis_client, copy_from
+from app.db.search import search_condition, search_rank
 from app.models.business_promo import PromoCode, PromoCodeCreate, PromoCodeBase, PromoCodeStatistics, \
-    PatchPromoCode
+    PatchPromoCode, CompanyStats, CompanyDailyStats, CompanyCountryStats
 
 router = APIRouter()
 
+PROMO_BATCH_MAX_SIZE = 1000
+UNIQUE_CODES_BATCH_SIZE = 10000
+UNIQUE_CODE_MAX_LENGTH = 30
+# Код в UTF-8 плюс обрамление строки CSV/JSON ({"code": "..."})
+UNIQUE_CODE_MAX_LINE_BYTES = UNIQUE_CODE_MAX_LENGTH * 4 + 64
 
-@router.post("/promo",
-             tags=["Создание нового промокода"],
-             description="Создает новый промокод для компании с настройкой таргетинга и типа промокодов.")
-async def create_promo_code(promo_data: PromoCodeCreate,
-                            token_context: str = Depends(token.get_token),
-                            db: Session = Depends(get_db)):
-    if not token_context:
-        return JSONResponse(status_code=400, content={
-            "status": "error",
-            "message": "Ошибка в данных запроса. token"
-        })
-    if not token.check_valid_company_token(token_context):
-        return JSONResponse(status_code=401, content={
-            "status": "error",
-            "message": "Пользователь не авторизован."
-        })
+
+class LineTooLong(ValueError):
+    pass
+
+
+def validate_promo_mode(promo_data: PromoCodeCreate) -> Optional[str]:
     if promo_data.mode not in {"COMMON", "UNIQUE"}:
-        return JSONResponse(status_code=400, content={
-            "status": "error",
-            "message": "Ошибка в данных запроса. promo_data.mode not 'COMMON' or 'UNIQUE'."
-        })
+        return "Ошибка в данных запроса. promo_data.mode not 'COMMON' or 'UNIQUE'."
     if promo_data.mode == "COMMON" and not promo_data.promo_common:
-        return JSONResponse(status_code=400, content={
-            "status": "error",
-            "message": "Ошибка в данных запроса. COMMON promo_data.promo_common not set"
-        })
+        return "Ошибка в данных запроса. COMMON promo_data.promo_common not set"
     if promo_data.mode == "UNIQUE" and (not promo_data.promo_unique or promo_data.max_count != 1):
-        return JSONResponse(status_code=400, content={
-            "status": "error",
-            "message": "Ошибка в данных запроса. UNIQUE promo_data.promo_unique not set"
-        })
+        return "Ошибка в данных запроса. UNIQUE promo_data.promo_unique not set"
+    return None
+
+
+def build_promo_code(promo_data: PromoCodeCreate, token_context: str):
     promo_target = {key: value for key, value in promo_data.target.dict().items() if value is not None}
     if promo_data.active_until in ["None", None]:
         active_until = date.max
@@ -79,30 +82,111 @@ async def create_promo_code(promo_data: PromoCodeCreate,
         created=datetime.today(),
     )
 
-    try:
-        promo_country = new_promo_code.target["country"]
-    except:
-        promo_country = "UNKNOWN"
+    promo_country = promo_target.get("country", "UNKNOWN")
 
     new_promo_code_statistics = PromoCodeStatistics(
         promo_id=new_promo_code.promo_id,
         country=promo_country,
         activations_count=0
     )
+    return new_promo_code, new_promo_code_statistics
 
-    db.add(new_promo_code)
-    db.commit()
-    db.refresh(new_promo_code)
 
+@router.post("/promo",
+             tags=["Создание нового промокода"],
+             description="Создает новый промокод для компании с настройкой таргетинга и типа промокодов.")
+@idempotent
+async def create_promo_code(promo_data: PromoCodeCreate,
+                            token_context: str = Depends(token.get_token),
+                            db: Session = Depends(get_db)):
+    if not token_context:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса. token"
+        })
+    if not token.check_valid_company_token(token_context):
+        return JSONResponse(status_code=401, content={
+            "status": "error",
+            "message": "Пользователь не авторизован."
+        })
+    error = validate_promo_mode(promo_data)
+    if error:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": error
+        })
+
+    new_promo_code, new_promo_code_statistics = build_promo_code(promo_data, token_context)
+
+    db.add(new_promo_code)
     db.add(new_promo_code_statistics)
     db.commit()
-    db.refresh(new_promo_code_statistics)
+    etags.bump(etags.FEED_VERSION_KEY)
+    # Агрегаты компании обновляются воркером фоновых задач
+    enqueue("company.delta", company_id=new_promo_code.company_id, promos=1)
 
     return JSONResponse(status_code=201,
                         content={"id": str(new_promo_code.promo_id)
                                  })
 
 
+@router.post("/promo/batch",
+             tags=["Пакетное создание промокодов"],
+             description="Создает несколько промокодов компании за один запрос в одной транзакции."
+                         " Возвращает id созданных промокодов в порядке запроса и ошибки по каждому элементу.")
+async def create_promo_code_batch(promo_batch: List[dict] = Body(..., max_length=PROMO_BATCH_MAX_SIZE),
+                                  token_context: str = Depends(token.get_token),
+                                  db: Session = Depends(get_db)):
+    if not token_context:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса. token"
+        })
+    if not token.check_valid_company_token(token_context):
+        return JSONResponse(status_code=401, content={
+            "status": "error",
+            "message": "Пользователь не авторизован."
+        })
+
+    results = []
+    promo_rows = []
+    statistics_rows = []
+    for item in promo_batch:
+        try:
+            promo_data = PromoCodeCreate.model_validate(item)
+        except ValidationError as e:
+            results.append({
+                "status": "error",
+                "message": "Ошибка в данных запроса.",
+                "details": e.errors(include_url=False, include_context=False)
+            })
+            continue
+        error = validate_promo_mode(promo_data)
+        if error:
+            results.append({"status": "error", "message": error})
+            continue
+        new_promo_code, new_promo_code_statistics = build_promo_code(promo_data, token_context)
+        promo_rows.append({column.key: getattr(new_promo_code, column.key)
+                           for column in PromoCode.__table__.columns if column.computed is None})
+        statistics_rows.append({
+            "promo_id": new_promo_code_statistics.promo_id,
+            "country": new_promo_code_statistics.country,
+            "activations_count": new_promo_code_statistics.activations_count,
+        })
+        results.append({"id": str(new_promo_code.promo_id)})
+
+    if promo_rows:
+        # Один multi-row INSERT на таблицу вместо commit+refresh на каждый промокод
+        db.execute(insert(PromoCode), promo_rows)
+        db.execute(insert(PromoCodeStatistics), statistics_rows)
+        db.commit()
+        etags.bump(etags.FEED_VERSION_KEY)
+        enqueue("company.delta", company_id=token.get_token_info(token_context, "_id"), promos=len(promo_rows))
+
+    return JSONResponse(status_code=201 if promo_rows else 400,
+                        content=jsonable_encoder(results))
+
+
 @router.get("/promo",
             tags=["Получить список промокодов"],
             description="Возвращает список промокодов компании с возможностью фильтрации, сортировки и пагинации.")
@@ -111,7 +195,7 @@ async def list_promo_code(limit: int = 10,
                           sort_by: Optional[str] = Query("created", enum=["active_from", "active_until"]),
                           country: Optional[List[str]] = Query(None),
                           token_context: str = Depends(token.get_token),
-                          db: Session = Depends(get_db)):
+                          db: Session = Depends(get_read_db)):
     if not token_context:
         return JSONResponse(status_code=400, content={
             "status": "error",
@@ -133,49 +217,193 @@ async def list_promo_code(limit: int = 10,
             or_(func.jsonb_extract_path_text(cast(PromoCode.target, JSONB), 'country').in_(country_filter),
                 func.jsonb_extract_path_text(cast(PromoCode.target, JSONB), 'country').is_(None)))
 
-    if sort_by == "active_from":
-        query = query.order_by(desc(PromoCode.active_from))
-        promo_codes = query.offset(offset).limit(limit).all()
-    elif sort_by == "active_until":
-        query = query.order_by(desc(PromoCode.active_until))
-        promo_codes = query.offset(offset).limit(limit).all()
+    total_count = query.count()
+
+    headers = {"x-total-count": str(total_count)}
+
+    sort_column = sort_by if sort_by in ("active_from", "active_until") else "created"
+    page_query = query.order_by(desc(getattr(PromoCode, sort_column))).offset(offset).limit(limit)
+    if limit > settings.STREAM_PAGE_THRESHOLD:
+        rows = stream_rows(db, page_query.with_session, PromoCode.to_dict)
+        return StreamingJSONResponse(rows, headers=headers)
+    return JSONResponse(content=[promo_code.to_dict() for promo_code in page_query.all()], headers=headers)
+
+
+EXPORT_CSV_HEADER = ["promo_id", "mode", "promo_common", "description", "image_url", "active", "max_count",
+                     "used_count", "like_count", "comment_count", "active_from", "active_until", "created",
+                     "target", "activations_count", "countries"]
+
+
+def export_row(row):
+    promo, activations_count, countries = row
+    promo_dict = promo.to_dict()
+    promo_dict.update({
+        "comment_count": promo.comment_count,
+        "created": str(promo.created),
+        "activations_count": activations_count or 0,
+        "countries": countries or [],
+    })
+    return promo_dict
+
+
+def export_csv_row(promo_dict):
+    values = []
+    for column in EXPORT_CSV_HEADER:
+        value = promo_dict.get(column)
+        if column == "countries":
+            value = ";".join(f"{item['country']}:{item['activations_count']}" for item in value)
+        elif isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False)
+        values.append("" if value is None else value)
+    return values
+
+
+@router.get("/promo/export",
+            tags=["Выгрузка промокодов компании"],
+            description="Потоково выгружает все промокоды компании вместе со статистикой активаций в формате NDJSON или CSV.")
+async def export_promo_codes(format: str = Query("ndjson", enum=["ndjson", "csv"]),
+                             token_context: str = Depends(token.get_token),
+                             db: Session = Depends(get_read_db)):
+    if not token_context:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса."
+        })
+    if not token.check_valid_company_token(token_context):
+        return JSONResponse(status_code=401, content={
+            "status": "error",
+            "message": "Пользователь не авторизован."
+        })
+    company_id = token.get_token_info(token_context, "_id")
+
+    stats = db.query(
+        PromoCodeStatistics.promo_id,
+        func.sum(PromoCodeStatistics.activations_count).label("activations_count"),
+        func.json_agg(func.json_build_object("country", PromoCodeStatistics.country,
+                                             "activations_count", PromoCodeStatistics.activations_count))
+        .label("countries"),
+    ).group_by(PromoCodeStatistics.promo_id).subquery()
+
+    def export_query(session: Session):
+        return (session.query(PromoCode, stats.c.activations_count, stats.c.countries)
+                .outerjoin(stats, stats.c.promo_id == PromoCode.promo_id)
+                .filter(PromoCode.company_id == company_id)
+                .order_by(PromoCode.created, PromoCode.promo_id))
+
+    rows = stream_rows(db, export_query, export_row)
+    if format == "csv":
+        body = iter_csv(EXPORT_CSV_HEADER, (export_csv_row(promo_dict) for promo_dict in rows))
+        media_type = "text/csv"
     else:
-        query = query.order_by(PromoCode.created)
-        promo_codes = query.all()
-        promo_codes.reverse()
-        promo_codes = promo_codes[offset:offset + limit]
+        body = iter_ndjson(rows)
+        media_type = "application/x-ndjson"
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="promo_export.{format}"'})
+
+
+@router.get("/promo/search",
+            tags=["Поиск промокодов компании"],
+            description="Полнотекстовый и нечеткий поиск по промокодам компании, отсортированный по релевантности.")
+async def search_promo_code(q: str = Query(..., min_length=1, max_length=100),
+                            limit: int = Query(10, ge=0, le=100),
+                            offset: int = Query(0, ge=0),
+                            token_context: str = Depends(token.get_token),
+                            db: Session = Depends(get_read_db)):
+    if not token_context:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса."
+        })
+    if not token.check_valid_company_token(token_context):
+        return JSONResponse(status_code=401, content={
+            "status": "error",
+            "message": "Пользователь не авторизован."
+        })
+    company_id = token.get_token_info(token_context, "_id")
+    query = db.query(PromoCode).filter(PromoCode.company_id == company_id, search_condition(q))
 
     total_count = query.count()
+    promo_codes = query.order_by(desc(search_rank(q)), desc(PromoCode.created), PromoCode.promo_id) \
+        .offset(offset).limit(limit).all()
+    return JSONResponse(content=[promo_code.to_dict() for promo_code in promo_codes],
+                        headers={"x-total-count": str(total_count)})
 
-    headers = {"x-total-count": str(total_count)}
 
-    return JSONResponse(content=[promo_code.to_dict() for promo_code in promo_codes], headers=headers)
+@router.get("/dashboard",
+            tags=["Дашборд компании"],
+            description="Возвращает суммарные лайки, комментарии и активации по всем промокодам компании и активации по странам."
+                        " При указании диапазона дат суммы считаются по дневным корзинам.")
+async def company_dashboard(date_from: Optional[date] = None,
+                            date_until: Optional[date] = None,
+                            token_context: str = Depends(token.get_token),
+                            db: Session = Depends(get_read_db)):
+    if not token_context:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса."
+        })
+    if not token.check_valid_company_token(token_context):
+        return JSONResponse(status_code=401, content={
+            "status": "error",
+            "message": "Пользователь не авторизован."
+        })
+    if date_from and date_until and date_from > date_until:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса. date_from > date_until"
+        })
+    company_id = token.get_token_info(token_context, "_id")
+
+    counters = ["promo_count", "like_count", "comment_count", "activations_count"]
+    if date_from or date_until:
+        query = db.query(*[func.coalesce(func.sum(getattr(CompanyDailyStats, column)), 0) for column in counters]) \
+            .filter(CompanyDailyStats.company_id == company_id)
+        if date_from:
+            query = query.filter(CompanyDailyStats.day >= date_from)
+        if date_until:
+            query = query.filter(CompanyDailyStats.day <= date_until)
+        response = dict(zip(counters, (int(value) for value in query.one())))
+        response.update({"date_from": date_from and str(date_from), "date_until": date_until and str(date_until)})
+        return JSONResponse(content={key: value for key, value in response.items() if value is not None})
+
+    stats = db.query(CompanyStats).get(company_id)
+    response = {column: getattr(stats, column) if stats else 0 for column in counters}
+    countries = db.query(CompanyCountryStats).filter(CompanyCountryStats.company_id == company_id) \
+        .order_by(desc(CompanyCountryStats.activations_count)).all()
+    response["countries"] = [{"country": stat.country, "activations_count": stat.activations_count}
+                             for stat in countries]
+    return JSONResponse(content=response)
 
 
 @router.get("/promo/{promo_id}",
             tags=["Получения промокода"],
             description="Получает данные промокода по его ID. С помощью этого эндпоинта компания может получить только свои промокоды.")
 async def get_promo_code(promo_id: str,
-                         token_context: str = Depends(token.get_token),
-                         db: Session = Depends(get_db)):
+                         token_context: str = Depends(token.get_token)):
     if not token_context:
         return JSONResponse(status_code=401, content={
                 "status": "error",
                 "message": "Пользователь не авторизован."
             })
-    promo = db.query(PromoCode).get(promo_id)
+    promo = await cached("business_promo", promo_id, load_promo_dict, promo_id,
+                         version_key=etags.promo_version_key(promo_id))
     if not promo:
         return JSONResponse(status_code=404, content={
             "status": "error",
             "message": "Промокод не найден."
         })
 
-    if token.get_token_info(token_context, "_id") != str(promo.company_id):
+    if token.get_token_info(token_context, "_id") != promo["company_id"]:
         return JSONResponse(status_code=403, content={
             "status": "error",
             "message": "Промокод не принадлежит этой компании."
         })
-    return JSONResponse(content=promo.to_dict())
+    return JSONResponse(content=promo)
+
+
+def load_promo_dict(db: Session, promo_id: str):
+    promo = db.query(PromoCode).get(promo_id)
+    return promo.to_dict() if promo else None
 
 
 @router.patch("/promo/{promo_id}",
@@ -225,6 +453,9 @@ async def patch_promo_code(patch_data: PatchPromoCode,
     db.add(promo)
     db.commit()
     db.refresh(promo)
+    invalidate("business_promo", promo_id)
+    invalidate("promo_card", promo_id)
+    etags.promo_changed(promo_id)
     return JSONResponse(content=promo.to_dict())
 
 
@@ -233,7 +464,7 @@ async def patch_promo_code(patch_data: PatchPromoCode,
             description="Возвращает статистику использования промокода по его ID.")
 async def promo_stat(promo_id: str,
                      token_context: str = Depends(token.get_token),
-                     db: Session = Depends(get_db)):
+                     db: Session = Depends(get_read_db)):
     if not token_context:
         return JSONResponse(status_code=400, content={
             "status": "error",
@@ -260,3 +491,176 @@ async def promo_stat(promo_id: str,
     activations_count = sum(stat.activations_count for stat in stats)
     countries = [{"country": stat.country, "activations_count": stat.activations_count} for stat in stats]
     return {"activations_count": activations_count, "countries": countries}
+
+
+async def iter_stream_lines(chunks, max_line: int):
+    # Хвост без перевода строки не растет дальше max_line: память ограничена и для тела без \n
+    tail = b""
+    async for chunk in chunks:
+        tail += chunk
+        *complete, tail = tail.split(b"\n")
+        for line in complete:
+            if len(line) > max_line:
+                raise LineTooLong()
+            yield line
+        if len(tail) > max_line:
+            raise LineTooLong()
+    if tail:
+        yield tail
+
+
+def parse_unique_code(line: bytes, content_type: str) -> Optional[str]:
+    line = line.strip()
+    if not line:
+        return None
+    text = line.decode("utf-8")
+    if "csv" in content_type:
+        row = next(csv.reader([text]), [])
+        return row[0].strip() if row else None
+    value = json.loads(text)
+    if isinstance(value, dict):
+        value = value.get("code")
+    return value if isinstance(value, str) else None
+
+
+def copy_unique_codes(db: Session, promo_id, codes) -> int:
+    # Загруженные значения живут в promo_unique_code; promo_unique в самом промокоде хранит
+    # только список, переданный при создании, и отдается в ответах API как есть
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for code in codes:
+        writer.writerow([code])
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS promo_unique_code_load (code VARCHAR(30)) ON COMMIT DELETE ROWS")
+        copy_from(cursor, "COPY promo_unique_code_load (code) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(
+            "INSERT INTO promo_unique_code (promo_id, code, issued) "
+            "SELECT DISTINCT %s, code, false FROM promo_unique_code_load "
+            "ON CONFLICT (promo_id, code) DO NOTHING",
+            (str(promo_id),))
+        inserted = cursor.rowcount
+    finally:
+        cursor.close()
+    db.commit()
+    return inserted
+
+
+@router.post("/promo/{promo_id}/unique-codes",
+             tags=["Загрузка уникальных промокодов"],
+             description="Потоково загружает уникальные значения промокода в формате NDJSON или CSV."
+                         " Значения дедуплицируются и записываются пачками, прогресс доступен по каждой пачке.")
+async def upload_unique_codes(promo_id: str,
+                              request: Request,
+                              token_context: str = Depends(token.get_token),
+                              db: Session = Depends(get_db)):
+    if not token_context:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса."
+        })
+    if not token.check_valid_company_token(token_context):
+        return JSONResponse(status_code=401, content={
+            "status": "error",
+            "message": "Пользователь не авторизован."
+        })
+    promo = db.query(PromoCode).get(promo_id)
+    if not promo:
+        return JSONResponse(status_code=404, content={
+            "status": "error",
+            "message": "Промокод не найден."
+        })
+    if token.get_token_info(token_context, "_id") != str(promo.company_id):
+        return JSONResponse(status_code=403, content={
+            "status": "error",
+            "message": "Промокод не принадлежит этой компании."
+        })
+    if promo.mode != "UNIQUE":
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса. promo.mode not 'UNIQUE'"
+        })
+    promo_uuid = promo.promo_id
+    progress_key = f"promo_unique_upload:{promo.company_id}:{promo_id}"
+    # Не держим соединение из пула, пока клиент передает тело
+    db.close()
+
+    content_type = request.headers.get("content-type", "")
+    progress = {"received": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "batches": 0}
+    await run_in_threadpool(redis_client.delete, progress_key)
+
+    # COPY и запись прогресса синхронные, поэтому пачка сбрасывается в пуле потоков,
+    # а цикл событий продолжает принимать тело запроса и другие запросы
+    def flush(batch):
+        inserted = copy_unique_codes(db, promo_uuid, batch)
+        progress["inserted"] += inserted
+        progress["duplicates"] += len(batch) - inserted
+        progress["batches"] += 1
+        redis_client.hset(progress_key, mapping=progress)
+        redis_client.expire(progress_key, 3600)
+
+    # Дедупликация внутри пачки через set, между пачками - через уникальный индекс,
+    # так что память ограничена размером пачки
+    batch = set()
+    header_checked = "csv" not in content_type
+    try:
+        async for line in iter_stream_lines(request.stream(), UNIQUE_CODE_MAX_LINE_BYTES):
+            if not line.strip():
+                continue
+            try:
+                code = parse_unique_code(line, content_type)
+            except (ValueError, UnicodeDecodeError):
+                code = None
+            if not header_checked:
+                header_checked = True
+                if code and code.lower() == "code":
+                    continue
+            progress["received"] += 1
+            if not code or len(code) > UNIQUE_CODE_MAX_LENGTH:
+                progress["invalid"] += 1
+                continue
+            if code in batch:
+                progress["duplicates"] += 1
+                continue
+            batch.add(code)
+            if len(batch) >= UNIQUE_CODES_BATCH_SIZE:
+                await run_in_threadpool(flush, batch)
+                batch = set()
+        if batch:
+            await run_in_threadpool(flush, batch)
+    except LineTooLong:
+        # Уже загруженные пачки остаются, прогресс показывает, сколько успело записаться
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": f"Ошибка в данных запроса. Строка длиннее {UNIQUE_CODE_MAX_LINE_BYTES} байт",
+            "progress": progress,
+        })
+
+    return JSONResponse(status_code=201, content=progress)
+
+
+@router.get("/promo/{promo_id}/unique-codes/progress",
+            tags=["Загрузка уникальных промокодов"],
+            description="Возвращает прогресс текущей загрузки уникальных значений промокода.")
+async def upload_unique_codes_progress(promo_id: str,
+                                       token_context: str = Depends(token.get_token)):
+    if not token_context:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": "Ошибка в данных запроса."
+        })
+    if not token.check_valid_company_token(token_context):
+        return JSONResponse(status_code=401, content={
+            "status": "error",
+            "message": "Пользователь не авторизован."
+        })
+    company_id = token.get_token_info(token_context, "_id")
+    progress = redis_client.hgetall(f"promo_unique_upload:{company_id}:{promo_id}")
+    if not progress:
+        return JSONResponse(status_code=404, content={
+            "status": "error",
+            "message": "Загрузка не найдена."
+        })
+    return {key.decode("utf-8"): int(value) for key, value in progress.items()}
@@ -0,0 +1,52 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse, FileResponse
+from pydantic import BaseModel, Field
+
+from app.core import profiling
+from app.db.session import redis_client
+
+router = APIRouter()
+
+
+class ProfilerToggle(BaseModel):
+    path_prefix: str = Field(..., min_length=1)
+    count: int = Field(10, ge=1, le=1000)
+    ttl: int = Field(600, ge=1, le=3600)
+
+
+@router.post("/debug/profiler",
+             tags=["Включить профилирование запросов"],
+             include_in_schema=False)
+async def enable_profiler(toggle: ProfilerToggle,
+                          x_profiler_secret: Optional[str] = Header(None)):
+    if not profiling.check_secret(x_profiler_secret):
+        return JSONResponse(status_code=403, content={"status": "error", "message": "Доступ запрещен."})
+    redis_client.hset(profiling.TOGGLE_KEY, mapping={"path_prefix": toggle.path_prefix, "remaining": toggle.count})
+    redis_client.expire(profiling.TOGGLE_KEY, toggle.ttl)
+    return {"status": "ok"}
+
+
+@router.delete("/debug/profiler",
+               tags=["Выключить профилирование запросов"],
+               include_in_schema=False)
+async def disable_profiler(x_profiler_secret: Optional[str] = Header(None)):
+    if not profiling.check_secret(x_profiler_secret):
+        return JSONResponse(status_code=403, content={"status": "error", "message": "Доступ запрещен."})
+    redis_client.delete(profiling.TOGGLE_KEY)
+    return {"status": "ok"}
+
+
+@router.get("/debug/profiles/{profile_id}",
+            tags=["Получить профиль запроса"],
+            include_in_schema=False)
+async def get_profile(profile_id: str,
+                      x_profiler_secret: Optional[str] = Header(None)):
+    if not profiling.check_secret(x_profiler_secret):
+        return JSONResponse(status_code=403, content={"status": "error", "message": "Доступ запрещен."})
+    path = profiling.profile_path(os.path.basename(profile_id))
+    if not os.path.exists(path):
+        return JSONResponse(status_code=404, content={"status": "error", "message": "Профиль не найден."})
+    return FileResponse(path, media_type="application/json")
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", tags=["Метрики приложения в формате Prometheus"], include_in_schema=False)
+async def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends, Security
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.core import token
+from app.core import etag as etags
+from app.core.cache import cached, invalidate
 from app.core.password import hash_password, verify_password
 from app.db.session import get_db, redis_client
 from app.models.user_auth import UserBase, User, UserSignin, UserPatch
@@ -12,8 +14,7 @@ router = APIRouter()
 @router.get("/profile",
             tags=["Получение профиля пользователя"],
             description="Возвращает данные профиля текущего пользователя.")
-async def profile(token_context: str = Security(token.get_token),
-                  db: Session = Depends(get_db)):
+async def profile(token_context: str = Security(token.get_token)):
     if not token_context:
         return JSONResponse(status_code=400, content={
             "status": "error",
@@ -25,8 +26,13 @@ async def profile(token_context: str = Security(token.get_token),
             "message": "Пользователь не авторизован."
         })
     user_id = token.get_token_info(token_context, "_id")
+    user = await cached("user", user_id, load_user_dict, user_id, version_key=etags.user_version_key(user_id))
+    return JSONResponse(content=user)
+
+
+def load_user_dict(db: Session, user_id: str):
     user = db.query(User).filter(User.user_id == user_id).first()
-    return JSONResponse(content=user.to_dict())
+    return user.to_dict() if user else None
 
 
 @router.patch("/profile",
@@ -57,4 +63,6 @@ async def patch_profile(patch_data: UserPatch,
     db.add(user)
     db.commit()
     db.refresh(user)
+    invalidate("user", user.user_id)
+    etags.bump(etags.user_version_key(user.user_id))
     return JSONResponse(content=user.to_dict())
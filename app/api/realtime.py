@@ -0,0 +1,40 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+
+from app.core import token
+from app.core.realtime import hub, Connection
+
+router = APIRouter()
+
+
+@router.websocket("/promo/updates")
+async def promo_updates(websocket: WebSocket,
+                        token_context: Optional[str] = Query(None, alias="token")):
+    # Браузер не может передать заголовок Authorization при открытии WebSocket,
+    # поэтому токен принимается и в query-параметре
+    if not token_context:
+        authorization = websocket.headers.get("authorization", "")
+        scheme, _, token_context = authorization.partition(" ")
+        if scheme.lower() != "bearer":
+            token_context = None
+    if not token_context or not token.check_valid_user_token(token_context):
+        await websocket.close(code=4401)
+        return
+
+    await websocket.accept()
+    connection = Connection(websocket)
+    sender = asyncio.create_task(connection.sender())
+    try:
+        while True:
+            message = await websocket.receive_json()
+            if not isinstance(message, dict):
+                continue
+            hub.watch(connection, [str(promo_id) for promo_id in message.get("watch", [])])
+            hub.unwatch(connection, [str(promo_id) for promo_id in message.get("unwatch", [])])
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        sender.cancel()
+        hub.unwatch(connection, list(connection.watched))
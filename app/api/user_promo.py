@@ -1,15 +1,29 @@
+import base64
+from collections import deque
 from datetime import timezone, datetime
 from typing import Optional
+import uuid
 import httpx
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import desc, tuple_
 from sqlalchemy.orm import Session
 from fastapi.responses import JSONResponse
 
 from app.core import token
-from app.db.session import get_db, redis_client
+from app.db.session import get_db, get_read_db, redis_client
+from app.db.search import search_promos
+from app.db.profiler import query_budget
+from app.core.singleflight import coalesce
+from app.core.cache import cached, invalidate
+from app.core.config import settings
+from app.core.streaming import StreamingJSONResponse, stream_rows
+from app.core import etag as etags
+from app.core.realtime import publish_count_delta
+from app.core.tasks import enqueue
+from app.core.idempotency import idempotent
+from app.api.profile import load_user_dict
 from app.models.business_promo import PromoCode, Target, PromoComments, PromoCommentBase, PromoActions, \
-    PromoCodeStatistics
+    PromoCodeStatistics, PromoBatchLookup
 from app.models.user_auth import User
 from app.api.antifraud import call_antifraud
 router = APIRouter()
@@ -20,116 +34,218 @@ router = APIRouter()
             description="Возвращает ленту промокодов с поддержкой пагинации, фильтрации и сортировки."
                         " Возвращаются промокоды, которые соответствуют настройкам таргетинга. Промокоды отсортированы по убыванию даты создания.")
 async def get_feed(
+        request: Request,
         category: Optional[str] = Query(None, description="Категория промокодов"),
         active: Optional[bool] = Query(None, description="Фильтрация по активности"),
         limit: int = Query(10, ge=0, description="Максимальное количество записей"),
         offset: int = Query(0, ge=0, description="Сдвиг от начала выборки"),
         token_context: str = Depends(token.get_token),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     if not token_context:
         return JSONResponse(status_code=400, content={"status": "error", "message": "Ошибка в данных запроса."})
     if not token.check_valid_user_token(token_context):
         return JSONResponse(status_code=401, content={"status": "error", "message": "Пользователь не авторизован."})
 
-    user = db.query(User).get(token.get_token_info(token_context, "_id"))
+    user_id = token.get_token_info(token_context, "_id")
+    # Версия пользователя меняется вместе с профилем: возраст и страна определяют таргетинг ленты
+    feed_version, user_version = etags.versions(etags.FEED_VERSION_KEY, etags.user_version_key(user_id))
+    etag = etags.make_etag("feed", feed_version, user_version, user_id, category, active, limit, offset)
+    if etags.matches(request, etag, exists=True):
+        return etags.not_modified(etag)
+    user = await cached("user", user_id, load_user_dict, user_id, version=user_version)
+    # api.yml не ограничивает limit сверху: слишком большие страницы молча урезаются
+    limit = min(limit, settings.FEED_MAX_LIMIT)
 
     promo_query = db.query(PromoCode)
 
     if active is not None:
         promo_query = promo_query.filter(PromoCode.active == active)
 
-    filtered_promo_codes = []
-    promo_codes = reversed(promo_query.all())
+    # Строки читаются с серверного курсора, в памяти остаются только последние offset + limit
+    # подходящих промокодов: лента идет в обратном порядке, поэтому страница берется с хвоста
+    window = deque(maxlen=offset + limit)
+    total_count = 0
+    for promo in iter_promos_for_user(promo_query.yield_per(settings.STREAM_YIELD_PER), user["other"], category):
+        total_count += 1
+        window.append(promo)
+    paginated_promo_codes = list(reversed(window))[offset:offset + limit]
 
-    for promo in promo_codes:
-        target = promo.target
+    user_promo_actions = db.query(PromoActions).filter(PromoActions.user_id == user_id).all()
+    promo_actions = {pa.promo_id: pa for pa in user_promo_actions}
 
-        age_from = target.get("age_from", 0)
-        age_until = target.get("age_until", 100)
-        country = target.get("country", "")
-        categories = target.get("categories", [])
+    headers = {"x-total-count": str(total_count), "ETag": etag}
+    response = [feed_card(promo, promo_actions.get(promo.promo_id)) for promo in paginated_promo_codes]
+    return JSONResponse(content=response, headers=headers)
 
-        if age_from <= user.other["age"] <= age_until and (
-                country.lower() == user.other["country"].lower() or country == ""):
-            if category:
-                for cat in categories:
-                    if cat.lower() == category.lower():
-                        filtered_promo_codes.append(promo)
-            else:
-                filtered_promo_codes.append(promo)
 
-    user_promo_actions = db.query(PromoActions).filter(PromoActions.user_id == user.user_id).all()
-    promo_actions = {pa.promo_id: pa for pa in user_promo_actions}
+def feed_card(promo: PromoCode, promo_action: Optional[PromoActions]):
+    new_dict = {
+        "promo_id": str(promo.promo_id),
+        "company_id": str(promo.company_id),
+        "company_name": promo.company_name,
+        "description": promo.description,
+        "image_url": promo.image_url,
+        "active": promo.active,
+        "is_activated_by_user": promo_action.is_activated_by_user if promo_action else False,
+        "like_count": promo.like_count,
+        "is_liked_by_user": promo_action.is_liked_by_user if promo_action else False,
+        "comment_count": promo.comment_count,
+    }
+    return delete_none(new_dict)
 
-    paginated_promo_codes = filtered_promo_codes[offset:offset + limit]
 
-    total_count = len(filtered_promo_codes)
-    headers = {"x-total-count": str(total_count)}
+@router.post("/promo/batch",
+             tags=["Просмотр нескольких промокодов"],
+             description="Возвращает промокоды с переданными id в том же порядке."
+                         " Для ненайденных промокодов возвращается отметка not_found.")
+async def get_promo_batch(lookup: PromoBatchLookup,
+                          token_context: str = Depends(token.get_token),
+                          db: Session = Depends(get_read_db)):
+    if not token_context:
+        return JSONResponse(status_code=400, content={"status": "error", "message": "Ошибка в данных запроса."})
+    if not token.check_valid_user_token(token_context):
+        return JSONResponse(status_code=401, content={"status": "error", "message": "Пользователь не авторизован."})
+
+    promo_ids = {}
+    for promo_id in lookup.ids:
+        try:
+            promo_ids[promo_id] = uuid.UUID(promo_id)
+        except ValueError:
+            continue
+
+    user_id = token.get_token_info(token_context, "_id")
+    promos = {}
+    promo_actions = {}
+    if promo_ids:
+        ids = set(promo_ids.values())
+        promos = {promo.promo_id: promo for promo in db.query(PromoCode).filter(PromoCode.promo_id.in_(ids))}
+        promo_actions = {pa.promo_id: pa for pa in db.query(PromoActions).filter(
+            PromoActions.user_id == user_id, PromoActions.promo_id.in_(ids))}
+
     response = []
-    for promo in paginated_promo_codes:
-        new_dict = {
-            "promo_id": str(promo.promo_id),
-            "company_id": str(promo.company_id),
-            "company_name": promo.company_name,
-            "description": promo.description,
-            "image_url": promo.image_url,
-            "active": promo.active,
-            "is_activated_by_user": promo_actions.get(promo.promo_id,
-                                                      PromoActions()).is_activated_by_user if promo_actions.get(
-                promo.promo_id) else False,
-            "like_count": promo.like_count,
-            "is_liked_by_user": promo_actions.get(promo.promo_id,
-                                                  PromoActions()).is_liked_by_user if promo_actions.get(
-                promo.promo_id) else False,
-            "comment_count": promo.comment_count,
-        }
-        new_dict = delete_none(new_dict)
-        response.append(new_dict)
+    for promo_id in lookup.ids:
+        promo = promos.get(promo_ids.get(promo_id))
+        if promo is None:
+            response.append({"promo_id": promo_id, "status": "not_found"})
+        else:
+            response.append(feed_card(promo, promo_actions.get(promo.promo_id)))
+    return JSONResponse(content=response)
+
+
+@router.get("/promo/search",
+            tags=["Поиск промокодов"],
+            description="Полнотекстовый и нечеткий поиск по описанию промокода и названию компании."
+                        " Возвращаются только промокоды, подходящие пользователю по таргетингу, отсортированные по релевантности.")
+async def search_promo(
+        request: Request,
+        q: str = Query(..., min_length=1, max_length=100, description="Поисковый запрос"),
+        category: Optional[str] = Query(None, description="Категория промокодов"),
+        active: Optional[bool] = Query(None, description="Фильтрация по активности"),
+        limit: int = Query(10, ge=0, le=100, description="Максимальное количество записей"),
+        offset: int = Query(0, ge=0, description="Сдвиг от начала выборки"),
+        token_context: str = Depends(token.get_token),
+        db: Session = Depends(get_read_db)
+):
+    if not token_context:
+        return JSONResponse(status_code=400, content={"status": "error", "message": "Ошибка в данных запроса."})
+    if not token.check_valid_user_token(token_context):
+        return JSONResponse(status_code=401, content={"status": "error", "message": "Пользователь не авторизован."})
 
-    return JSONResponse(content=response, headers=headers)
+    user_id = token.get_token_info(token_context, "_id")
+    feed_version, user_version = etags.versions(etags.FEED_VERSION_KEY, etags.user_version_key(user_id))
+    etag = etags.make_etag("search", feed_version, user_version, user_id, q, category, active, limit, offset)
+    if etags.matches(request, etag, exists=True):
+        return etags.not_modified(etag)
+    user = await cached("user", user_id, load_user_dict, user_id, version=user_version)
+
+    promo_query = search_promos(db, q)
+    if active is not None:
+        promo_query = promo_query.filter(PromoCode.active == active)
+
+    # Кандидатов отбирают GIN-индексы, таргетинг проверяется так же, как в ленте
+    page = []
+    total_count = 0
+    for promo in iter_promos_for_user(promo_query.yield_per(settings.STREAM_YIELD_PER), user["other"], category):
+        if offset <= total_count < offset + limit:
+            page.append(promo)
+        total_count += 1
+
+    promo_actions = {}
+    if page:
+        promo_actions = {pa.promo_id: pa for pa in db.query(PromoActions).filter(
+            PromoActions.user_id == user_id, PromoActions.promo_id.in_([promo.promo_id for promo in page]))}
+
+    headers = {"x-total-count": str(total_count), "ETag": etag}
+    return JSONResponse(content=[feed_card(promo, promo_actions.get(promo.promo_id)) for promo in page],
+                        headers=headers)
 
 
 @router.get("/promo/{id}", tags=["Просмотр промокода по id"], description="Возвращает промокод с этим id")
 async def get_promo(
         id: str,
+        request: Request,
         token_context: str = Depends(token.get_token),
-        db: Session = Depends(get_db)):
+        db: Session = Depends(get_read_db)):
     if not token_context:
         return JSONResponse(status_code=400, content={"status": "error", "message": "Ошибка в данных запроса."})
 
     if not token.check_valid_user_token(token_context):
         return JSONResponse(status_code=401, content={"status": "error", "message": "Пользователь не авторизован."})
 
-    promo = db.query(PromoCode).filter(PromoCode.promo_id == id).first()
+    user_id = token.get_token_info(token_context, "_id")
+    promo_version, = etags.versions(etags.promo_version_key(id))
+    etag = etags.make_etag("promo", id, promo_version, user_id)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+
+    promo = await cached("promo_card", id, load_promo_card, id, version=promo_version)
     if not promo:
         return JSONResponse(status_code=404, content={"status": "error", "message": "Промокод не найден."})
+    if etags.matches(request, etag, exists=True):
+        return etags.not_modified(etag)
 
-    user_id = token.get_token_info(token_context, "_id")
-    user_promo_actions = db.query(PromoActions).filter_by(user_id=user_id, promo_id=promo.promo_id).first()
+    user_promo_actions = db.query(PromoActions).filter_by(user_id=user_id, promo_id=promo["promo_id"]).first()
 
     is_activated_by_user = user_promo_actions.is_activated_by_user if user_promo_actions else False
     is_liked_by_user = user_promo_actions.is_liked_by_user if user_promo_actions else False
 
     response = {
+        "promo_id": promo["promo_id"],
+        "company_id": promo["company_id"],
+        "company_name": promo["company_name"],
+        "description": promo["description"],
+        "image_url": promo["image_url"],
+        "active": promo["active"],
+        "is_activated_by_user": is_activated_by_user,
+        "like_count": promo["like_count"],
+        "is_liked_by_user": is_liked_by_user,
+        "comment_count": promo["comment_count"],
+    }
+
+    return JSONResponse(content=delete_none(response), headers={"ETag": etag})
+
+
+def load_promo_card(db: Session, id: str):
+    promo = db.query(PromoCode).filter(PromoCode.promo_id == id).first()
+    if not promo:
+        return None
+    return {
         "promo_id": str(promo.promo_id),
         "company_id": str(promo.company_id),
         "company_name": promo.company_name,
         "description": promo.description,
         "image_url": promo.image_url,
         "active": promo.active,
-        "is_activated_by_user": is_activated_by_user,
         "like_count": promo.like_count,
-        "is_liked_by_user": is_liked_by_user,
         "comment_count": promo.comment_count,
     }
 
-    return JSONResponse(content=delete_none(response))
-
 
 @router.post("/promo/{id}/like",
              tags=["Добавить лайк к промокоду"],
              description="Добавляет лайк к указанному промокоду. Повторный лайк не изменяет состояния, возвращается успешный ответ.")
+@query_budget(10)
 def like_promo(id: str,
                token_context: str = Depends(token.get_token),
                db: Session = Depends(get_db)):
@@ -144,6 +260,7 @@ def like_promo(id: str,
     user = db.query(User).filter(User.user_id == token.get_token_info(token_context, "_id")).first()
     promo_action = db.query(PromoActions).filter(PromoActions.user_id == user.user_id).first()
 
+    like_delta = 0
     if not promo_action:
         new_promo_action = PromoActions(
             promo_id=id,
@@ -151,26 +268,20 @@ def like_promo(id: str,
             is_activated_by_user=False,
             is_liked_by_user=True
         )
-        setattr(promo, "like_count", promo.like_count + 1)
-
+        setattr(promo, "like_count", PromoCode.like_count + 1)
         db.add(new_promo_action)
-        db.commit()
-        db.refresh(new_promo_action)
-
-        db.add(promo)
-        db.commit()
-        db.refresh(promo)
+        like_delta = 1
     elif not promo_action.is_liked_by_user:
         setattr(promo_action, "is_liked_by_user", True)
-        setattr(promo, "like_count", promo.like_count + 1)
-
-        db.add(promo)
-        db.commit()
-        db.refresh(promo)
-
-        db.add(promo_action)
-        db.commit()
-        db.refresh(promo_action)
+        setattr(promo, "like_count", PromoCode.like_count + 1)
+        like_delta = 1
+    db.commit()
+    invalidate("promo_card", id)
+    invalidate("business_promo", id)
+    etags.promo_changed(id)
+    if like_delta:
+        publish_count_delta(id, likes=like_delta)
+        enqueue("company.delta", company_id=promo.company_id, likes=like_delta)
 
     return JSONResponse(content={"status": "ok"})
 
@@ -178,6 +289,7 @@ def like_promo(id: str,
 @router.delete("/promo/{id}/like",
                tags=["Удалить лайк с промокода"],
                description="Удаляет лайк с указанного промокода. Если лайк не стоит, возвращается успешный ответ.")
+@query_budget(10)
 async def dislike_promo(id: str,
                         token_context: str = Depends(token.get_token),
                         db: Session = Depends(get_db)):
@@ -192,6 +304,7 @@ async def dislike_promo(id: str,
     user = db.query(User).filter(User.user_id == token.get_token_info(token_context, "_id")).first()
     promo_action = db.query(PromoActions).filter(PromoActions.user_id == user.user_id).first()
 
+    like_delta = 0
     if not promo_action:
         new_promo_action = PromoActions(
             promo_id=id,
@@ -199,21 +312,18 @@ async def dislike_promo(id: str,
             is_activated_by_user=False,
             is_liked_by_user=False
         )
-
         db.add(new_promo_action)
-        db.commit()
-        db.refresh(new_promo_action)
     elif promo_action.is_liked_by_user:
         setattr(promo_action, "is_liked_by_user", False)
-        setattr(promo, "like_count", promo.like_count - 1)
-
-        db.add(promo)
-        db.commit()
-        db.refresh(promo)
-
-        db.add(promo_action)
-        db.commit()
-        db.refresh(promo_action)
+        setattr(promo, "like_count", PromoCode.like_count - 1)
+        like_delta = -1
+    db.commit()
+    invalidate("promo_card", id)
+    invalidate("business_promo", id)
+    etags.promo_changed(id)
+    if like_delta:
+        publish_count_delta(id, likes=like_delta)
+        enqueue("company.delta", company_id=promo.company_id, likes=like_delta)
 
     return JSONResponse(content={"status": "ok"})
 
@@ -222,6 +332,8 @@ async def dislike_promo(id: str,
              tags=["Добавить комментарий к промокоду"],
              description="Добавляет комментарий к указанному промокоду."
                          " Пользователь может оставить несколько комментариев к одному и тому же промокоду.")
+@query_budget(10)
+@idempotent
 async def comment_promo(id: str,
                         PromoComment: PromoCommentBase,
                         token_context: str = Depends(token.get_token),
@@ -234,45 +346,26 @@ async def comment_promo(id: str,
     promo = db.query(PromoCode).get(id)
     if not promo:
         return JSONResponse(status_code=404, content={"status": "error", "message": "Промокод не найден."})
-    user = db.query(User).filter(User.user_id == token.get_token_info(token_context, "_id")).first()
-
-    promo_action = db.query(PromoActions).filter(PromoActions.user_id == user.user_id).first()
+    user_id = token.get_token_info(token_context, "_id")
+    user = await cached("user", user_id, load_user_dict, user_id, version_key=etags.user_version_key(user_id))
 
-    if not promo_action:
-        new_promo_action = PromoActions(
-            promo_id=str(id),
-            user_id=str(user.user_id),
-            is_activated_by_user=False,
-            is_liked_by_user=False
-        )
-        promo_action = new_promo_action
-        db.add(promo_action)
-        db.commit()
-        db.refresh(promo_action)
+    promo_action = db.query(PromoActions).filter(PromoActions.user_id == user_id).first()
 
     author = {
-        "name": user.name,
-        "surname": user.surname,
-        "avatar_url": user.avatar_url
+        "name": user.get("name"),
+        "surname": user.get("surname"),
+        "avatar_url": user.get("avatar_url")
     }
 
     new_promo_comment = PromoComments(
+        comment_id=uuid.uuid4(),
         promo_id=str(id),
-        user_id=str(user.user_id),
+        user_id=str(user_id),
         text=PromoComment.text,
+        comment_date=datetime.now(timezone.utc),
         author=author,
     )
 
-    setattr(promo, "comment_count", promo.comment_count + 1)
-
-    db.add(promo)
-    db.commit()
-    db.refresh(promo)
-
-    db.add(new_promo_comment)
-    db.commit()
-    db.refresh(new_promo_comment)
-
     response = {
         "id": str(new_promo_comment.comment_id),
         "text": str(new_promo_comment.text),
@@ -280,6 +373,21 @@ async def comment_promo(id: str,
         "author": new_promo_comment.author,
     }
 
+    if not promo_action:
+        db.add(PromoActions(
+            promo_id=str(id),
+            user_id=str(user_id),
+            is_activated_by_user=False,
+            is_liked_by_user=False
+        ))
+    setattr(promo, "comment_count", PromoCode.comment_count + 1)
+    db.add(new_promo_comment)
+    db.commit()
+    invalidate("promo_card", id)
+    etags.promo_changed(id)
+    publish_count_delta(id, comments=1)
+    enqueue("company.delta", company_id=promo.company_id, comments=1)
+
     return JSONResponse(status_code=201, content=delete_none(response))
 
 
@@ -288,42 +396,58 @@ async def comment_promo(id: str,
             description="Возвращает список комментариев к указанному промокоду."
                         " Комментарии отсортированы по убыванию даты публикации.")
 async def comment_promo_id(id: str,
-                           limit: int = 10,
-                           offset: int = 0,
+                           request: Request,
+                           limit: int = Query(10, ge=0),
+                           offset: int = Query(0, ge=0),
+                           cursor: Optional[str] = Query(None, description="Курсор следующей страницы из x-next-cursor"),
                            token_context: str = Depends(token.get_token),
-                           db: Session = Depends(get_db)):
+                           db: Session = Depends(get_read_db)):
     if not token_context:
         return JSONResponse(status_code=400, content={"status": "error", "message": "Ошибка в данных запроса."})
     if not token.check_valid_user_token(token_context):
         return JSONResponse(status_code=401, content={"status": "error", "message": "Пользователь не авторизован."})
 
-    promo = db.query(PromoCode).get(id)
-    if not promo:
+    promo_version, = etags.versions(etags.promo_version_key(id))
+    etag = etags.make_etag("comments", id, promo_version, cursor, offset, limit)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+
+    cursor_key = None
+    if cursor:
+        try:
+            cursor_key = decode_comment_cursor(cursor)
+        except ValueError:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "Ошибка в данных запроса."})
+
+    if limit > settings.STREAM_PAGE_THRESHOLD:
+        # Большие страницы не собираются в памяти: строки идут в ответ прямо с серверного курсора
+        promo = db.query(PromoCode).get(id)
+        if not promo:
+            return JSONResponse(status_code=404, content={"status": "error", "message": "Промокод не найден."})
+        if etags.matches(request, etag, exists=True):
+            return etags.not_modified(etag)
+        headers = {"x-total-count": str(promo.comment_count), "ETag": etag}
+        # Заголовки уходят до тела, поэтому ключ последней строки страницы берем отдельным
+        # запросом по индексу (promo_id, comment_date, comment_id)
+        last = comment_page_query(db, id, 1, offset + limit - 1, cursor_key, skip=limit - 1,
+                                  entities=(PromoComments.comment_date, PromoComments.comment_id)).first()
+        if last:
+            headers["x-next-cursor"] = encode_comment_cursor(last)
+        rows = stream_rows(db, lambda session: comment_page_query(session, id, limit, offset, cursor_key), comment_dict)
+        return StreamingJSONResponse(rows, headers=headers)
+
+    page = await coalesce(f"promo_comments:{id}:{promo_version}:{cursor}:{offset}:{limit}",
+                          load_comment_page, db, id, limit, offset, cursor_key)
+    if page is None:
         return JSONResponse(status_code=404, content={"status": "error", "message": "Промокод не найден."})
-
-    query = db.query(PromoComments).filter(PromoComments.promo_id == id)
-
-    comments = query.order_by(desc("comment_date")).offset(offset).limit(limit).all()
-
-    response = []
-    for comment in comments:
-        author = {
-            "name": comment.author.get("name"),
-            "surname": comment.author.get("surname"),
-            "avatar_url": comment.author.get("avatar_url") if comment.author.get("avatar_url") else None,
-        }
-        author = delete_none(author)
-        resp = {
-            "id": str(comment.comment_id),
-            "text": str(comment.text),
-            "date": str(comment.comment_date) + ":00",
-            "author": author,
-        }
-        resp = delete_none(resp)
-        response.append(resp)
-    total_count = query.count()
-
-    headers = {"x-total-count": str(total_count)}
+    if etags.matches(request, etag, exists=True):
+        return etags.not_modified(etag)
+    response = page["comments"]
+
+    # comment_count поддерживается обработчиками комментариев, отдельный count() не нужен
+    headers = {"x-total-count": str(page["total_count"]), "ETag": etag}
+    if page["next_cursor"]:
+        headers["x-next-cursor"] = page["next_cursor"]
     return JSONResponse(status_code=200, content=response, headers=headers)
 
 
@@ -333,7 +457,7 @@ async def comment_promo_id(id: str,
 async def comment_id_promo_id(id: str,
                               comment_id: str,
                               token_context: str = Depends(token.get_token),
-                              db: Session = Depends(get_db)):
+                              db: Session = Depends(get_read_db)):
     if not token_context:
         return JSONResponse(status_code=400, content={"status": "error", "message": "Ошибка в данных запроса."})
     if not token.check_valid_user_token(token_context):
@@ -383,6 +507,7 @@ async def comment_id_promo_id(id: str,
     db.add(comment)
     db.commit()
     db.refresh(comment)
+    etags.bump(etags.promo_version_key(id))
 
     response = {
         "id": str(comment.comment_id),
@@ -424,10 +549,15 @@ async def delete_comment_promo_id(id: str,
 
     db.delete(comment)
     db.commit()
+    invalidate("promo_card", id)
+    etags.promo_changed(id)
+    publish_count_delta(id, comments=-1)
+    enqueue("company.delta", company_id=promo.company_id, comments=-1)
 
     return {"status": "ok"}
 
 @router.post("/promo/{id}/activate")
+@idempotent
 async def promo_activate(id: str,
                          token_context: str = Depends(token.get_token),
                          db: Session = Depends(get_db)):
@@ -460,7 +590,77 @@ async def promo_activate(id: str,
 
     return JSONResponse(content=antifraud_data)
 
+def iter_promos_for_user(promo_codes, user_other, category=None):
+    for promo in promo_codes:
+        target = promo.target
+
+        age_from = target.get("age_from", 0)
+        age_until = target.get("age_until", 100)
+        country = target.get("country", "")
+        categories = target.get("categories", [])
+
+        if age_from <= user_other["age"] <= age_until and (
+                country.lower() == user_other["country"].lower() or country == ""):
+            if category:
+                for cat in categories:
+                    if cat.lower() == category.lower():
+                        yield promo
+            else:
+                yield promo
+
+
 def delete_none(data):
     data = {key: value for key, value in data.items() if value not in [None, "None"]}
     return data
 
+
+def load_comment_page(db: Session, id: str, limit: int, offset: int, cursor_key=None):
+    promo = db.query(PromoCode).get(id)
+    if not promo:
+        return None
+
+    comments = comment_page_query(db, id, limit, offset, cursor_key).all()
+    response = [comment_dict(comment) for comment in comments]
+
+    next_cursor = encode_comment_cursor(comments[-1]) if limit and len(comments) == limit else None
+    return {"comments": response, "total_count": promo.comment_count, "next_cursor": next_cursor}
+
+
+def comment_page_query(db: Session, id: str, limit: int, offset: int, cursor_key=None, skip: int = 0,
+                       entities=(PromoComments,)):
+    query = db.query(*entities).filter(PromoComments.promo_id == id)
+    if cursor_key:
+        query = query.filter(tuple_(PromoComments.comment_date, PromoComments.comment_id) < cursor_key).offset(skip)
+    else:
+        query = query.offset(offset)
+    return query.order_by(desc(PromoComments.comment_date), desc(PromoComments.comment_id)).limit(limit)
+
+
+def comment_dict(comment: PromoComments):
+    author = {
+        "name": comment.author.get("name"),
+        "surname": comment.author.get("surname"),
+        "avatar_url": comment.author.get("avatar_url") if comment.author.get("avatar_url") else None,
+    }
+    author = delete_none(author)
+    resp = {
+        "id": str(comment.comment_id),
+        "text": str(comment.text),
+        "date": str(comment.comment_date) + ":00",
+        "author": author,
+    }
+    return delete_none(resp)
+
+
+def encode_comment_cursor(comment: PromoComments) -> str:
+    raw = f"{comment.comment_date.isoformat()}|{comment.comment_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("utf-8")
+
+
+def decode_comment_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("utf-8")).decode("utf-8")
+        comment_date, comment_id = raw.split("|")
+        return datetime.fromisoformat(comment_date), uuid.UUID(comment_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("invalid cursor") from e
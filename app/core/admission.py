@@ -0,0 +1,111 @@
+import asyncio
+import json
+import math
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.credentials import credential_hash
+from app.db.session import redis_client
+
+EXEMPT_PATHS = {"/api/ping", "/api/metrics"}
+
+TOKEN_BUCKET_SCRIPT = redis_client.register_script("""
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+""")
+
+
+class ConcurrencyLimiter:
+    def __init__(self, limit: int, queue_depth: int):
+        self.limit = limit
+        self.queue_depth = queue_depth
+        self.waiting = 0
+        self.semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        # Очередь ограничена: лишние запросы сразу получают 503, а не копятся в threadpool
+        if self.semaphore.locked() and self.waiting >= self.queue_depth:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), settings.ADMISSION_QUEUE_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self.semaphore.release()
+
+
+def route_class(method: str, path: str) -> str:
+    if "/auth/" in path:
+        return "auth"
+    if method in ("GET", "HEAD"):
+        return "feed"
+    return "writes"
+
+
+def take_token(credential: str):
+    result = TOKEN_BUCKET_SCRIPT(keys=[f"rate_limit:{credential}"],
+                                 args=[settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST, time.time()])
+    allowed, tokens = int(result[0]), float(result[1])
+    retry_after = 0 if allowed else math.ceil((1 - tokens) / settings.RATE_LIMIT_PER_SECOND)
+    return bool(allowed), retry_after
+
+
+async def reject(send, status_code: int, retry_after: Optional[int], message: str):
+    body = json.dumps({"status": "error", "message": message}, ensure_ascii=False).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(max(retry_after, 1)).encode("latin-1")))
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.limiters = {
+            "auth": ConcurrencyLimiter(settings.ADMISSION_AUTH_CONCURRENCY, settings.ADMISSION_AUTH_QUEUE),
+            "feed": ConcurrencyLimiter(settings.ADMISSION_FEED_CONCURRENCY, settings.ADMISSION_FEED_QUEUE),
+            "writes": ConcurrencyLimiter(settings.ADMISSION_WRITES_CONCURRENCY, settings.ADMISSION_WRITES_QUEUE),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if settings.RATE_LIMIT_ENABLED:
+            authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+            credential = credential_hash(authorization)
+            if credential:
+                allowed, retry_after = take_token(credential)
+                if not allowed:
+                    await reject(send, 429, retry_after, "Слишком много запросов, повторите позже.")
+                    return
+
+        limiter = self.limiters[route_class(scope["method"], scope["path"])]
+        if not await limiter.acquire():
+            await reject(send, 503, settings.ADMISSION_RETRY_AFTER, "Сервис перегружен, повторите позже.")
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
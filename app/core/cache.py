@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core import etag as etags
+from app.core import singleflight
+from app.core.singleflight import coalesce
+from app.db.session import SessionLocal, redis_client
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class LocalCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = (time.monotonic() + self.ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+local_cache = LocalCache(settings.CACHE_L1_MAX_SIZE, settings.CACHE_L1_TTL_SECONDS)
+_subscriber = None
+
+
+def cache_key(namespace: str, key) -> str:
+    return f"cache:{namespace}:{key}"
+
+
+def load_from_primary(loader, *args):
+    # Кеш заполняется только с primary: отстающая реплика вернула бы данные до записи,
+    # и они легли бы в L2 на весь TTL сразу после invalidate()
+    db = SessionLocal()
+    try:
+        return loader(db, *args)
+    finally:
+        db.close()
+
+
+async def cached(namespace: str, key, loader, *args, version=None, version_key=None):
+    # С version запись, загруженная до записи в объект, не отдается под новой версией:
+    # ETag, посчитанный по версии, всегда соответствует телу ответа.
+    # С version_key версия читается только при промахе L1: L1 чистит pub/sub-инвалидация,
+    # а загрузка, начатая до записи и закончившаяся после invalidate(), ляжет в L2 под старой версией
+    if not settings.CACHE_ENABLED:
+        return load_from_primary(loader, *args)
+    full_key = cache_key(namespace, key)
+    entry = local_cache.get(full_key)
+    if entry is not None and (version_key is not None or entry["version"] == version):
+        return entry["value"]
+    if version_key is not None:
+        version, = etags.versions(version_key)
+    raw = redis_client.get(full_key)
+    if raw is not None:
+        entry = json.loads(raw)
+        if entry["version"] == version:
+            local_cache.set(full_key, entry)
+            return entry["value"]
+    flight_key = full_key if version is None else f"{full_key}:{version}"
+    value = await coalesce(flight_key, load_from_primary, loader, *args)
+    # None (объект не найден) не кешируем, чтобы созданный позже объект сразу стал виден
+    if value is not None:
+        entry = {"version": version, "value": value}
+        redis_client.setex(full_key, settings.CACHE_L2_TTL_SECONDS, json.dumps(entry))
+        local_cache.set(full_key, entry)
+    return value
+
+
+def invalidate(namespace: str, key):
+    full_key = cache_key(namespace, key)
+    local_cache.delete(full_key)
+    singleflight.forget(full_key)
+    redis_client.delete(full_key)
+    redis_client.publish(INVALIDATION_CHANNEL, full_key)
+
+
+def handle_invalidation(message):
+    data = message["data"]
+    full_key = data.decode("utf-8") if isinstance(data, bytes) else data
+    local_cache.delete(full_key)
+    singleflight.local.forget(full_key)
+
+
+def start_invalidation_listener():
+    # Поток-подписчик создается в каждом воркере после fork: он удаляет ключи из L1,
+    # когда любой воркер на любом узле пишет в объект
+    global _subscriber
+    if _subscriber is not None:
+        return
+    local_cache.clear()
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{INVALIDATION_CHANNEL: handle_invalidation})
+    _subscriber = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+
+def stop_invalidation_listener():
+    global _subscriber
+    if _subscriber is not None:
+        _subscriber.stop()
+        _subscriber = None
@@ -11,5 +11,101 @@ class Settings(BaseSettings):
     dbname: ClassVar[str] = os.getenv('POSTGRES_DATABASE', 'postgres')
     DATABASE_URL: str = f'postgresql://{username}:{password}@{host}:{port}/{dbname}'
 
+    # psycopg2 или psycopg (psycopg3 с серверными prepared statements)
+    DB_DRIVER: str = 'psycopg2'
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # После скольких выполнений psycopg3 готовит запрос на сервере
+    DB_PREPARE_THRESHOLD: int = 5
+
+    # Пустой адрес реплики - все чтения идут в primary
+    DATABASE_REPLICA_URL: str = ''
+    # Сколько секунд после своей записи пользователь читает из primary
+    REPLICA_STICKY_SECONDS: int = 5
+
+    # Параметры production-запуска (server.py), переопределяются переменными окружения
+    SERVER_ADDRESS: str = 'localhost:8080'
+    WORKERS: int = os.cpu_count() or 1
+    LOOP: str = 'uvloop'
+    HTTP: str = 'httptools'
+    BACKLOG: int = 2048
+    TIMEOUT_KEEP_ALIVE: int = 5
+    TIMEOUT_GRACEFUL_SHUTDOWN: int = 30
+
+    METRICS_ENABLED: bool = True
+
+    SQL_PROFILER_ENABLED: bool = True
+    SQL_PROFILER_DEBUG_HEADER: bool = False
+    SQL_SLOW_QUERY_MS: float = 100
+    # В тестах включается, чтобы превышение бюджета запросов роняло запрос
+    SQL_QUERY_BUDGET_STRICT: bool = False
+
+    # Пустой секрет выключает профилирование живых запросов
+    PROFILER_SECRET: str = ''
+    PROFILER_SIGNATURE_TTL: int = 300
+    PROFILER_RATE_LIMIT_PER_MINUTE: int = 10
+    PROFILER_INTERVAL: float = 0.001
+    PROFILER_OUTPUT_DIR: str = '/tmp/profiles'
+
+    # Лимиты одновременных запросов и длины очереди на воркер по классам маршрутов
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_AUTH_CONCURRENCY: int = 8
+    ADMISSION_AUTH_QUEUE: int = 32
+    ADMISSION_FEED_CONCURRENCY: int = 64
+    ADMISSION_FEED_QUEUE: int = 256
+    ADMISSION_WRITES_CONCURRENCY: int = 32
+    ADMISSION_WRITES_QUEUE: int = 128
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+    ADMISSION_RETRY_AFTER: int = 1
+
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_PER_SECOND: float = 20
+    RATE_LIMIT_BURST: int = 40
+
+    # local - объединение запросов внутри воркера, redis - между воркерами через блокировку
+    SINGLEFLIGHT_ENABLED: bool = True
+    SINGLEFLIGHT_MODE: str = 'local'
+    SINGLEFLIGHT_WINDOW_MS: int = 100
+    SINGLEFLIGHT_LOCK_TTL_MS: int = 2000
+    SINGLEFLIGHT_POLL_MS: int = 10
+
+    CACHE_ENABLED: bool = True
+    CACHE_L1_MAX_SIZE: int = 10000
+    CACHE_L1_TTL_SECONDS: float = 30
+    CACHE_L2_TTL_SECONDS: int = 300
+
+    # Ответы меньше порога не сжимаются; страницы больше порога отдаются потоком с серверного курсора
+    COMPRESSION_MIN_SIZE: int = 1024
+    STREAM_PAGE_THRESHOLD: int = 100
+    # Лента собирается целиком до первого байта (x-total-count и обратный порядок), поэтому limit ограничен
+    FEED_MAX_LIMIT: int = 100
+    STREAM_YIELD_PER: int = 500
+    STREAM_CHUNK_SIZE: int = 64 * 1024
+
+    REALTIME_BATCH_MS: int = 250
+    REALTIME_SEND_TIMEOUT: float = 5
+    REALTIME_MAX_WATCH: int = 200
+
+    # Фоновые задачи: Redis Stream с группой потребителей; воркер запускается в процессе API
+    # или отдельно через python -m app.core.tasks
+    TASKS_STREAM: str = 'tasks'
+    TASKS_GROUP: str = 'workers'
+    TASKS_WORKER_INPROCESS: bool = True
+    TASKS_BATCH_SIZE: int = 100
+    TASKS_BLOCK_MS: int = 5000
+    TASKS_CLAIM_IDLE_MS: int = 30000
+    TASKS_MAX_ATTEMPTS: int = 5
+    TASKS_STREAM_MAXLEN: int = 100000
+    TASKS_PROCESSED_TTL_HOURS: int = 24
+
+    # Первый ответ на запрос с Idempotency-Key хранится TTL секунд, дубли ждут выполняющийся оригинал
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_LOCK_TTL_MS: int = 30000
+    IDEMPOTENCY_POLL_MS: int = 50
+    IDEMPOTENCY_MAX_KEY_LENGTH: int = 255
+
 
 settings = Settings()
@@ -0,0 +1,10 @@
+import hashlib
+
+
+def credential_hash(authorization: str):
+    # Подпись токена здесь не проверяется, поэтому ключом служит весь токен, а не sub:
+    # поддельный токен с чужим sub получает свой ключ, а не ключ владельца
+    scheme, _, credentials = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not credentials:
+        return None
+    return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
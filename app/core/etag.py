@@ -0,0 +1,63 @@
+import hashlib
+import time
+
+from fastapi import Request, Response
+
+from app.db.session import redis_client
+
+FEED_VERSION_KEY = "version:feed"
+# Версии сами по себе истекают: ключи для несуществующих id не копятся в Redis,
+# а заново созданная версия не совпадает ни с одной выданной ранее
+VERSION_TTL_SECONDS = 24 * 3600
+
+
+def promo_version_key(promo_id) -> str:
+    return f"version:promo:{promo_id}"
+
+
+def user_version_key(user_id) -> str:
+    return f"version:user:{user_id}"
+
+
+def bump(*keys):
+    # Начальное значение - время в наносекундах: если ключ вытеснят из Redis,
+    # новая версия не совпадет ни с одной выданной ранее
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.set(key, time.time_ns(), nx=True, ex=VERSION_TTL_SECONDS)
+        pipe.incr(key)
+    pipe.execute()
+
+
+def promo_changed(promo_id):
+    bump(promo_version_key(promo_id), FEED_VERSION_KEY)
+
+
+def versions(*keys):
+    values = redis_client.mget(keys)
+    missing = [key for key, value in zip(keys, values) if value is None]
+    if missing:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in missing:
+            pipe.set(key, time.time_ns(), nx=True, ex=VERSION_TTL_SECONDS)
+        pipe.execute()
+        values = redis_client.mget(keys)
+    return [value.decode("utf-8") for value in values]
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def matches(request: Request, etag: str, exists: bool = False) -> bool:
+    # "*" совпадает с любым существующим представлением: до проверки, что ресурс есть, его не учитываем
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return (exists and "*" in candidates) or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,132 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+
+from starlette.routing import Match
+
+from app.core.admission import reject
+from app.core.config import settings
+from app.core.credentials import credential_hash
+from app.db.session import redis_client
+
+HEADER = b"idempotency-key"
+
+
+def idempotent(func):
+    func.idempotent = True
+    return func
+
+
+def resolve_route(scope):
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def replay(send, record: dict):
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": base64.b64decode(record["body"])})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(HEADER, b"").decode("latin-1")
+        route = resolve_route(scope) if key else None
+        if not getattr(getattr(route, "endpoint", None), "idempotent", False):
+            await self.app(scope, receive, send)
+            return
+        # Повторы и отказы отвечают, не доходя до роутера: без route метрики записали бы их в unmatched
+        scope["route"] = route
+        if len(key) > settings.IDEMPOTENCY_MAX_KEY_LENGTH:
+            await reject(send, 400, None, "Ошибка в данных запроса. Idempotency-Key слишком длинный.")
+            return
+
+        body = await read_body(receive)
+        # Повтор отдается без проверки токена обработчиком, поэтому запись привязана ко всему токену
+        credential = credential_hash(headers.get(b"authorization", b"").decode("latin-1")) or "anonymous"
+        record_key = f"idempotency:{credential}:{scope['path']}:{key}"
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_TTL_MS / 1000
+        while True:
+            pending = json.dumps({"state": "pending", "fingerprint": fingerprint})
+            if redis_client.set(record_key, pending, nx=True, px=settings.IDEMPOTENCY_LOCK_TTL_MS):
+                await self.execute(scope, body, receive, send, record_key, fingerprint)
+                return
+            raw = redis_client.get(record_key)
+            if raw is None:
+                # Оригинал завершился ошибкой и снял отметку: выполняем запрос сами
+                continue
+            record = json.loads(raw)
+            if record["fingerprint"] != fingerprint:
+                await reject(send, 422, None, "Idempotency-Key уже использован с другим телом запроса.")
+                return
+            if record["state"] == "done":
+                await replay(send, record)
+                return
+            if time.monotonic() >= deadline:
+                await reject(send, 409, 1, "Запрос с этим Idempotency-Key еще выполняется.")
+                return
+            await asyncio.sleep(settings.IDEMPOTENCY_POLL_MS / 1000)
+
+    async def execute(self, scope, body: bytes, receive, send, record_key: str, fingerprint: str):
+        # Сохраненный ответ отдается и клиентам с другим Accept-Encoding, поэтому внутрь уходит запрос без сжатия
+        # Меняем только заголовки в исходном scope: route, записанный роутером, нужен MetricsMiddleware
+        scope["headers"] = [(name, value) for name, value in scope["headers"] if name != b"accept-encoding"]
+        response = {"status": 500, "headers": [], "body": []}
+        received = False
+
+        async def receive_body():
+            nonlocal received
+            if received:
+                return await receive()
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [(name.decode("latin-1"), value.decode("latin-1"))
+                                       for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_wrapper)
+        except BaseException:
+            redis_client.delete(record_key)
+            raise
+        if response["status"] >= 500:
+            # Ошибки сервера не запоминаем: повтор клиента должен выполниться заново
+            redis_client.delete(record_key)
+            return
+        redis_client.set(record_key, json.dumps({
+            "state": "done",
+            "fingerprint": fingerprint,
+            "status": response["status"],
+            "headers": response["headers"],
+            "body": base64.b64encode(b"".join(response["body"])).decode("ascii"),
+        }), ex=settings.IDEMPOTENCY_TTL_SECONDS)
@@ -0,0 +1,118 @@
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest, REGISTRY
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+from app.core.config import settings
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса по маршруту",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DEPENDENCY_LATENCY = Histogram(
+    "dependency_duration_seconds",
+    "Время обращения к зависимостям (db, redis, bcrypt, antifraud)",
+    ["dependency", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def timer(dependency: str, operation: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        DEPENDENCY_LATENCY.labels(dependency, operation).observe(time.perf_counter() - start)
+
+
+def timed(dependency: str, operation: str):
+    def decorator(func):
+        if not settings.METRICS_ENABLED:
+            return func
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timer(dependency, operation):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(dependency, operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine):
+    if not settings.METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.metrics_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = context.metrics_query_start
+        operation = statement.lstrip().split(" ", 1)[0].upper()
+        DEPENDENCY_LATENCY.labels("db", operation).observe(time.perf_counter() - start)
+
+
+def instrument_redis(client):
+    if not settings.METRICS_ENABLED:
+        return
+    execute_command = client.execute_command
+
+    @wraps(execute_command)
+    def timed_execute_command(*args, **options):
+        with timer("redis", str(args[0]).upper()):
+            return execute_command(*args, **options)
+
+    client.execute_command = timed_execute_command
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Шаблон маршрута вместо фактического пути, чтобы не плодить метки по id
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route_path, str(status_code)).observe(time.perf_counter() - start)
+
+
+def render_metrics():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
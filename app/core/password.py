@@ -1,11 +1,15 @@
 from passlib.context import CryptContext
 
+from app.core.metrics import timed
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@timed("bcrypt", "hash")
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 
+@timed("bcrypt", "verify")
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
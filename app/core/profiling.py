@@ -0,0 +1,101 @@
+import hashlib
+import hmac
+import os
+import time
+import uuid
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+
+from app.core.config import settings
+from app.db.session import redis_client
+
+TOGGLE_KEY = "profiler:toggle"
+TOGGLE_CACHE_SECONDS = 1.0
+
+_toggle_cache = {"fetched_at": 0.0, "path_prefix": None}
+
+
+def sign(method: str, path: str, timestamp: str) -> str:
+    message = f"{method}:{path}:{timestamp}".encode("utf-8")
+    return hmac.new(settings.PROFILER_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def check_secret(secret: str) -> bool:
+    return bool(settings.PROFILER_SECRET) and hmac.compare_digest(secret or "", settings.PROFILER_SECRET)
+
+
+def has_valid_signature(scope, headers) -> bool:
+    signature = headers.get(b"x-profile-signature")
+    timestamp = headers.get(b"x-profile-timestamp")
+    if not signature or not timestamp:
+        return False
+    timestamp = timestamp.decode("latin-1")
+    try:
+        if abs(time.time() - int(timestamp)) > settings.PROFILER_SIGNATURE_TTL:
+            return False
+    except ValueError:
+        return False
+    expected = sign(scope["method"], scope["path"], timestamp)
+    return hmac.compare_digest(signature.decode("latin-1"), expected)
+
+
+def toggled_for(path: str) -> bool:
+    # Проверяем переключатель в Redis не чаще раза в секунду, чтобы не платить round trip на каждый запрос
+    now = time.monotonic()
+    if now - _toggle_cache["fetched_at"] > TOGGLE_CACHE_SECONDS:
+        path_prefix = redis_client.hget(TOGGLE_KEY, "path_prefix")
+        _toggle_cache["path_prefix"] = path_prefix.decode("utf-8") if path_prefix else None
+        _toggle_cache["fetched_at"] = now
+    path_prefix = _toggle_cache["path_prefix"]
+    if path_prefix is None or not path.startswith(path_prefix):
+        return False
+    if redis_client.hincrby(TOGGLE_KEY, "remaining", -1) < 0:
+        redis_client.delete(TOGGLE_KEY)
+        _toggle_cache["path_prefix"] = None
+        return False
+    return True
+
+
+def acquire_rate_limit() -> bool:
+    key = f"profiler:rate:{int(time.time() // 60)}"
+    count = redis_client.incr(key)
+    if count == 1:
+        redis_client.expire(key, 60)
+    return count <= settings.PROFILER_RATE_LIMIT_PER_MINUTE
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(settings.PROFILER_OUTPUT_DIR, f"{profile_id}.speedscope.json")
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILER_SECRET:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not (has_valid_signature(scope, headers) or toggled_for(scope["path"])) or not acquire_rate_limit():
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = str(uuid.uuid4())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode("latin-1"))]
+            await send(message)
+
+        profiler = Profiler(interval=settings.PROFILER_INTERVAL, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            os.makedirs(settings.PROFILER_OUTPUT_DIR, exist_ok=True)
+            with open(profile_path(profile_id), "w") as f:
+                f.write(profiler.output(SpeedscopeRenderer()))
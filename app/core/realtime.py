@@ -0,0 +1,100 @@
+import asyncio
+import json
+import logging
+
+import redis.asyncio
+import redis.exceptions
+
+from app.core.config import settings
+from app.db.session import redis_client, redis_host, redis_port
+
+logger = logging.getLogger("realtime")
+
+COUNTS_CHANNEL = "promo:counts"
+
+
+def publish_count_delta(promo_id, likes: int = 0, comments: int = 0):
+    redis_client.publish(COUNTS_CHANNEL, json.dumps({"promo_id": str(promo_id), "likes": likes, "comments": comments}))
+
+
+class Connection:
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.watched = set()
+        # Дельты копятся по promo_id, поэтому очередь на соединение ограничена числом
+        # отслеживаемых промокодов, а не числом событий
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def add(self, promo_id: str, likes: int, comments: int):
+        delta = self.pending.setdefault(promo_id, {"promo_id": promo_id, "likes": 0, "comments": 0})
+        delta["likes"] += likes
+        delta["comments"] += comments
+        self.ready.set()
+
+    async def sender(self):
+        try:
+            while True:
+                await self.ready.wait()
+                await asyncio.sleep(settings.REALTIME_BATCH_MS / 1000)
+                self.ready.clear()
+                batch, self.pending = list(self.pending.values()), {}
+                await asyncio.wait_for(self.websocket.send_json({"updates": batch}), settings.REALTIME_SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Клиент не успевает читать: закрываем соединение, а не копим для него данные
+            await self.websocket.close(code=1013)
+
+
+class Hub:
+    def __init__(self):
+        self.subscribers = {}
+        self.task = None
+
+    def watch(self, connection: Connection, promo_ids):
+        for promo_id in promo_ids:
+            if len(connection.watched) >= settings.REALTIME_MAX_WATCH:
+                break
+            connection.watched.add(promo_id)
+            self.subscribers.setdefault(promo_id, set()).add(connection)
+
+    def unwatch(self, connection: Connection, promo_ids):
+        for promo_id in promo_ids:
+            connection.watched.discard(promo_id)
+            connections = self.subscribers.get(promo_id)
+            if connections is not None:
+                connections.discard(connection)
+                if not connections:
+                    del self.subscribers[promo_id]
+
+    def dispatch(self, data: bytes):
+        delta = json.loads(data)
+        for connection in self.subscribers.get(delta["promo_id"], ()):
+            connection.add(delta["promo_id"], delta["likes"], delta["comments"])
+
+    async def listen(self):
+        while True:
+            client = redis.asyncio.Redis(host=redis_host, port=redis_port, db=0)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(COUNTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(message["data"])
+            except redis.exceptions.ConnectionError:
+                logger.warning("realtime: lost Redis subscription, reconnecting")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.listen())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+hub = Hub()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import redis_client
+
+RECENT_MAX_SIZE = 10000
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self, window: float):
+        self.window = window
+        self.calls = {}
+        self.recent = {}
+
+    async def do(self, key: str, fn, *args):
+        if self.window:
+            recent = self.recent.get(key)
+            if recent and time.monotonic() - recent[0] <= self.window:
+                return recent[1]
+
+        future = self.calls.get(key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # Отмена лидера касается только его запроса: ожидающие повторяют вызов сами
+                future = self.calls.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self.calls[key] = future
+        try:
+            # Блокирующий запрос к БД уходит в threadpool, поэтому остальные запросы
+            # за тем же ключом успевают подписаться на future
+            result = await run_in_threadpool(fn, *args)
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self.calls[key]
+        future.set_result(result)
+        if self.window:
+            if len(self.recent) >= RECENT_MAX_SIZE:
+                self.recent.clear()
+            self.recent[key] = (time.monotonic(), result)
+        return result
+
+    def forget(self, key: str):
+        self.recent.pop(key, None)
+
+
+local = SingleFlight(settings.SINGLEFLIGHT_WINDOW_MS / 1000)
+
+
+async def distributed(key: str, fn, *args):
+    lock_key = f"singleflight:lock:{key}"
+    result_key = f"singleflight:result:{key}"
+    cached = redis_client.get(result_key)
+    if cached is not None:
+        return json.loads(cached)
+
+    if redis_client.set(lock_key, 1, nx=True, px=settings.SINGLEFLIGHT_LOCK_TTL_MS):
+        try:
+            result = await local.do(key, fn, *args)
+            # Результат живет не дольше окна, так что устаревшие данные отдаются не дольше него
+            redis_client.set(result_key, json.dumps(result), px=max(settings.SINGLEFLIGHT_WINDOW_MS, 1))
+        finally:
+            redis_client.delete(lock_key)
+        return result
+
+    deadline = time.monotonic() + settings.SINGLEFLIGHT_LOCK_TTL_MS / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.SINGLEFLIGHT_POLL_MS / 1000)
+        cached = redis_client.get(result_key)
+        if cached is not None:
+            return json.loads(cached)
+        if not redis_client.exists(lock_key):
+            break
+    return await local.do(key, fn, *args)
+
+
+def forget(key: str):
+    # Вызывается при записи: результат, загруженный до нее, больше не отдается из окна
+    local.forget(key)
+    redis_client.delete(f"singleflight:result:{key}")
+
+
+async def coalesce(key: str, fn, *args):
+    if not settings.SINGLEFLIGHT_ENABLED:
+        return fn(*args)
+    if settings.SINGLEFLIGHT_MODE == "redis":
+        return await distributed(key, fn, *args)
+    return await local.do(key, fn, *args)
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from contextlib import contextmanager
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def iter_json_array(items):
+    # Элементы сериализуются по одному и отдаются кусками около STREAM_CHUNK_SIZE байт,
+    # так что в памяти нет ни полного списка, ни полного тела ответа
+    chunk = [b"["]
+    size = 1
+    first = True
+    for item in items:
+        encoded = json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if not first:
+            chunk.append(b",")
+        chunk.append(encoded)
+        size += len(encoded) + 1
+        first = False
+        if size >= settings.STREAM_CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    chunk.append(b"]")
+    yield b"".join(chunk)
+
+
+def iter_ndjson(items):
+    chunk = []
+    size = 0
+    for item in items:
+        encoded = json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        chunk.append(encoded)
+        size += len(encoded)
+        if size >= settings.STREAM_CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def iter_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= settings.STREAM_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class StreamingJSONResponse(StreamingResponse):
+    def __init__(self, items, status_code: int = 200, headers=None):
+        super().__init__(iter_json_array(items), status_code=status_code, headers=headers,
+                         media_type="application/json")
+
+
+@contextmanager
+def stream_session(db: Session):
+    # Зависимость get_db закрывает сессию до отправки тела, поэтому у потока своя сессия
+    # на том же engine (primary или реплика), что выбрала зависимость
+    session = Session(bind=db.get_bind())
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def stream_rows(db: Session, query_factory, serialize):
+    with stream_session(db) as session:
+        for row in query_factory(session).yield_per(settings.STREAM_YIELD_PER):
+            yield serialize(row)
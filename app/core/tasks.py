@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import redis.asyncio
+import redis.exceptions
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal, redis_client, redis_host, redis_port
+from app.models.tasks import ProcessedTask
+
+logger = logging.getLogger("tasks")
+
+PRUNE_INTERVAL = 3600
+
+handlers = {}
+
+
+def task(name: str):
+    def decorator(func):
+        handlers[name] = func
+        return func
+    return decorator
+
+
+def load_handlers():
+    import app.db.jobs  # noqa: F401
+
+
+def dead_letter_stream() -> str:
+    return f"{settings.TASKS_STREAM}:dead"
+
+
+def enqueue(name: str, **payload) -> str:
+    task_id = str(uuid.uuid4())
+    redis_client.xadd(settings.TASKS_STREAM, {"id": task_id, "name": name, "payload": json.dumps(payload, default=str)},
+                      maxlen=settings.TASKS_STREAM_MAXLEN, approximate=True)
+    return task_id
+
+
+def run_task(task_id: str, name: str, payload: dict):
+    # Отметка о выполнении коммитится вместе с результатом обработчика:
+    # повторная доставка после падения воркера не применит задачу второй раз
+    db = SessionLocal()
+    try:
+        marked = db.execute(insert(ProcessedTask).values(task_id=task_id, name=name)
+                            .on_conflict_do_nothing().returning(ProcessedTask.task_id)).first()
+        if marked is None:
+            db.rollback()
+            return
+        handlers[name](db, **payload)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def prune_processed():
+    db = SessionLocal()
+    try:
+        threshold = datetime.now(timezone.utc) - timedelta(hours=settings.TASKS_PROCESSED_TTL_HOURS)
+        db.execute(delete(ProcessedTask).where(ProcessedTask.processed_at < threshold))
+        db.commit()
+    finally:
+        db.close()
+
+
+class Worker:
+    def __init__(self, consumer: str = None):
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.task = None
+        self.pruned_at = 0.0
+
+    async def ensure_group(self, client):
+        try:
+            await client.xgroup_create(settings.TASKS_STREAM, settings.TASKS_GROUP, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def handle(self, client, message_id, fields, attempts: int = 1):
+        try:
+            await self.process(client, message_id, fields, attempts)
+        except redis.exceptions.ConnectionError:
+            raise
+        except Exception:
+            # Без XACK сообщение остается в pending: claim вернет его, а после
+            # TASKS_MAX_ATTEMPTS доставок оно уйдет в dead-letter
+            logger.exception("tasks: failed to handle message %s", message_id)
+
+    async def process(self, client, message_id, fields, attempts: int):
+        try:
+            task_id = fields[b"id"].decode("utf-8")
+            name = fields[b"name"].decode("utf-8")
+            payload = json.loads(fields[b"payload"])
+        except (KeyError, ValueError) as e:
+            # Битое сообщение не исправится повторной доставкой
+            logger.error("tasks: malformed message %s moved to %s: %r", message_id, dead_letter_stream(), e)
+            await self.dead_letter(client, message_id, fields, e)
+            return
+        try:
+            await run_in_threadpool(run_task, task_id, name, payload)
+        except Exception as e:
+            if attempts < settings.TASKS_MAX_ATTEMPTS:
+                # Без XACK сообщение остается в pending и вернется через claim после TASKS_CLAIM_IDLE_MS
+                logger.warning("tasks: %s %s failed (attempt %d): %r", name, task_id, attempts, e)
+                return
+            logger.error("tasks: %s %s moved to %s after %d attempts: %r",
+                         name, task_id, dead_letter_stream(), attempts, e)
+            await self.dead_letter(client, message_id, fields, e)
+            return
+        await client.xack(settings.TASKS_STREAM, settings.TASKS_GROUP, message_id)
+
+    async def dead_letter(self, client, message_id, fields, error: Exception):
+        await client.xadd(dead_letter_stream(), {**fields, b"error": repr(error)})
+        await client.xack(settings.TASKS_STREAM, settings.TASKS_GROUP, message_id)
+
+    async def claim(self, client):
+        # Забираем зависшие сообщения: неудачные попытки и задачи упавших воркеров
+        _, messages, *_ = await client.xautoclaim(settings.TASKS_STREAM, settings.TASKS_GROUP, self.consumer,
+                                                  min_idle_time=settings.TASKS_CLAIM_IDLE_MS, start_id="0-0",
+                                                  count=settings.TASKS_BATCH_SIZE)
+        for message_id, fields in messages:
+            if not fields:
+                await client.xack(settings.TASKS_STREAM, settings.TASKS_GROUP, message_id)
+                continue
+            pending = await client.xpending_range(settings.TASKS_STREAM, settings.TASKS_GROUP,
+                                                  min=message_id, max=message_id, count=1)
+            attempts = pending[0]["times_delivered"] if pending else 1
+            await self.handle(client, message_id, fields, attempts)
+
+    async def prune(self):
+        if time.monotonic() - self.pruned_at >= PRUNE_INTERVAL:
+            self.pruned_at = time.monotonic()
+            await run_in_threadpool(prune_processed)
+
+    async def run(self):
+        load_handlers()
+        while True:
+            client = redis.asyncio.Redis(host=redis_host, port=redis_port, db=0)
+            try:
+                await self.ensure_group(client)
+                while True:
+                    await self.claim(client)
+                    response = await client.xreadgroup(settings.TASKS_GROUP, self.consumer,
+                                                       {settings.TASKS_STREAM: ">"},
+                                                       count=settings.TASKS_BATCH_SIZE, block=settings.TASKS_BLOCK_MS)
+                    if not response:
+                        await self.prune()
+                    for _, messages in response:
+                        for message_id, fields in messages:
+                            await self.handle(client, message_id, fields)
+            except redis.exceptions.ConnectionError:
+                logger.warning("tasks: lost Redis connection, reconnecting")
+                await asyncio.sleep(1)
+            except redis.exceptions.ResponseError as e:
+                # NOGROUP после удаления потока или FLUSHALL: группа создается заново на следующем круге
+                logger.warning("tasks: Redis error %r, recreating consumer group", e)
+                await asyncio.sleep(1)
+            except Exception:
+                logger.exception("tasks: worker loop failed, restarting")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+worker = Worker()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воркер фоновых задач из Redis Stream")
+    parser.add_argument("--consumer", default=None, help="Имя потребителя в группе, по умолчанию host:pid")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(Worker(args.consumer).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+from datetime import datetime, timezone
+
+from sqlalchemy import func, delete, insert as sql_insert
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.business_promo import PromoCode, PromoCodeStatistics, CompanyStats, CompanyDailyStats, \
+    CompanyCountryStats
+
+COUNTERS = ("promo_count", "like_count", "comment_count", "activations_count")
+
+
+def upsert_increment(db: Session, model, keys: dict, deltas: dict):
+    statement = insert(model).values(**keys, **deltas)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: getattr(model, column) + statement.excluded[column] for column in deltas},
+    )
+    db.execute(statement)
+
+
+def record_company_delta(db: Session, company_id, promos=0, likes=0, comments=0, activations=0, country=None):
+    # Вызывается воркером фоновых задач (задача company.delta) в его собственной сессии, уже после
+    # commit самого изменения: агрегаты согласованы в конечном счете и отстают на время доставки задачи
+    deltas = dict(zip(COUNTERS, (promos, likes, comments, activations)))
+    deltas = {column: value for column, value in deltas.items() if value}
+    if not deltas:
+        return
+    day = datetime.now(timezone.utc).date()
+    upsert_increment(db, CompanyStats, {"company_id": company_id}, deltas)
+    upsert_increment(db, CompanyDailyStats, {"company_id": company_id, "day": day}, deltas)
+    if activations and country:
+        upsert_increment(db, CompanyCountryStats, {"company_id": company_id, "country": country},
+                         {"activations_count": activations})
+
+
+def rebuild_company_stats(db: Session):
+    # Итоги восстанавливаются из счетчиков промокодов; дневные корзины истории не имеют и не трогаются
+    activations = (db.query(PromoCodeStatistics.promo_id,
+                            func.sum(PromoCodeStatistics.activations_count).label("activations_count"))
+                   .group_by(PromoCodeStatistics.promo_id).subquery())
+    totals = (db.query(PromoCode.company_id,
+                       func.count(PromoCode.promo_id),
+                       func.coalesce(func.sum(PromoCode.like_count), 0),
+                       func.coalesce(func.sum(PromoCode.comment_count), 0),
+                       func.coalesce(func.sum(activations.c.activations_count), 0))
+              .outerjoin(activations, activations.c.promo_id == PromoCode.promo_id)
+              .group_by(PromoCode.company_id).all())
+    countries = (db.query(PromoCode.company_id, PromoCodeStatistics.country,
+                          func.sum(PromoCodeStatistics.activations_count))
+                 .join(PromoCodeStatistics, PromoCodeStatistics.promo_id == PromoCode.promo_id)
+                 .group_by(PromoCode.company_id, PromoCodeStatistics.country).all())
+
+    db.execute(delete(CompanyStats))
+    db.execute(delete(CompanyCountryStats))
+    if totals:
+        db.execute(sql_insert(CompanyStats), [dict(zip(("company_id",) + COUNTERS, row)) for row in totals])
+    if countries:
+        db.execute(sql_insert(CompanyCountryStats),
+                   [{"company_id": company_id, "country": country, "activations_count": count}
+                    for company_id, country, count in countries])
+    db.commit()
+    return len(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчет агрегатов дашборда компаний по текущим данным")
+    parser.parse_args()
+    db = SessionLocal()
+    try:
+        print(f"Пересчитано компаний: {rebuild_company_stats(db)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import json
+import sys
+
+import httpx
+from sqlalchemy import event, text
+
+from app.core import token
+from app.core.config import settings
+from app.db.session import engine, replica_engine, redis_client, SessionLocal
+from app.models.business_auth import Company
+from app.models.business_promo import PromoCode, PromoComments
+from app.models.user_auth import User
+
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def plan_shape(plan: dict, depth: int = 0):
+    nodes = [{
+        "depth": depth,
+        "node": plan["Node Type"],
+        "relation": plan.get("Relation Name"),
+        "index": plan.get("Index Name"),
+        "rows": plan.get("Plan Rows"),
+    }]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_shape(child, depth + 1))
+    return nodes
+
+
+def explain(connection, statement: str, parameters):
+    result = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return plan_shape(plan[0]["Plan"])
+
+
+def large_tables(connection, min_rows: int):
+    rows = connection.execute(text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples >= :min_rows"), {"min_rows": min_rows})
+    return {row[0] for row in rows}
+
+
+def endpoints():
+    db = SessionLocal()
+    try:
+        promo = db.query(PromoCode).order_by(PromoCode.comment_count.desc()).first()
+        comment = db.query(PromoComments).filter(PromoComments.promo_id == promo.promo_id).first()
+        user = db.query(User).first()
+        company = db.query(Company).filter(Company.company_id == promo.company_id).first()
+    finally:
+        db.close()
+
+    user_token = token.generate_user_token(user)
+    company_token = token.generate_company_token(company)
+    redis_client.setex(f"user_token:{user.user_id}", 3600, user_token)
+    redis_client.setex(f"company_token:{company.company_id}", 3600, company_token)
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+    company_headers = {"Authorization": f"Bearer {company_token}"}
+    promo_id = promo.promo_id
+
+    return [
+        ("GET /api/user/feed", "GET", "/api/user/feed", {"limit": 10}, user_headers),
+        ("GET /api/user/feed?category", "GET", "/api/user/feed", {"limit": 10, "category": "tech"}, user_headers),
+        ("GET /api/user/promo/search", "GET", "/api/user/promo/search", {"q": "скидка", "limit": 10}, user_headers),
+        ("GET /api/user/profile", "GET", "/api/user/profile", None, user_headers),
+        ("GET /api/user/promo/{id}", "GET", f"/api/user/promo/{promo_id}", None, user_headers),
+        ("GET /api/user/promo/{id}/comments", "GET", f"/api/user/promo/{promo_id}/comments",
+         {"limit": 10, "offset": 100}, user_headers),
+        ("GET /api/user/promo/{id}/comments/{comment_id}", "GET",
+         f"/api/user/promo/{promo_id}/comments/{comment.comment_id if comment else promo_id}", None, user_headers),
+        ("POST /api/user/promo/{id}/like", "POST", f"/api/user/promo/{promo_id}/like", None, user_headers),
+        ("DELETE /api/user/promo/{id}/like", "DELETE", f"/api/user/promo/{promo_id}/like", None, user_headers),
+        ("GET /api/business/promo", "GET", "/api/business/promo", {"limit": 10, "sort_by": "active_from"},
+         company_headers),
+        ("GET /api/business/promo?country", "GET", "/api/business/promo", {"limit": 10, "country": "ru"},
+         company_headers),
+        ("GET /api/business/promo/search", "GET", "/api/business/promo/search", {"q": "скидка", "limit": 10},
+         company_headers),
+        ("GET /api/business/promo/{id}", "GET", f"/api/business/promo/{promo_id}", None, company_headers),
+        ("GET /api/business/promo/{id}/stat", "GET", f"/api/business/promo/{promo_id}/stat", None, company_headers),
+    ]
+
+
+async def capture(min_rows: int):
+    from main import app
+
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+            captured.append((statement, parameters))
+
+    # Кеш и single-flight выключены: иначе при повторном запуске часть эндпоинтов
+    # не выполнит ни одного запроса и снимок будет меняться от запуска к запуску
+    settings.CACHE_ENABLED = False
+    settings.SINGLEFLIGHT_ENABLED = False
+    engines = {engine, replica_engine}
+    snapshot = {}
+    for instrumented in engines:
+        event.listen(instrumented, "before_cursor_execute", before_cursor_execute)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://explain") as client:
+            for name, method, url, params, headers in endpoints():
+                captured.clear()
+                await client.request(method, url, params=params, headers=headers)
+                snapshot[name] = list(captured)
+    finally:
+        for instrumented in engines:
+            event.remove(instrumented, "before_cursor_execute", before_cursor_execute)
+
+    with engine.connect() as connection:
+        large = large_tables(connection, min_rows)
+        plans = {name: [{"statement": statement, "plan": explain(connection, statement, parameters)}
+                        for statement, parameters in queries]
+                 for name, queries in snapshot.items()}
+        connection.rollback()
+    return plans, large
+
+
+def seq_scans(queries, large):
+    return {(query["statement"], node["relation"]) for query in queries for node in query["plan"]
+            if node["node"] == "Seq Scan" and node["relation"] in large}
+
+
+def shape(queries):
+    return [[(node["depth"], node["node"], node["relation"], node["index"]) for node in query["plan"]]
+            for query in queries]
+
+
+def compare(plans, baseline, large):
+    problems = []
+    for name, queries in plans.items():
+        base = baseline.get(name, [])
+        for statement, relation in sorted(seq_scans(queries, large) - seq_scans(base, large)):
+            problems.append(f"{name}: новый Seq Scan по {relation}: {statement[:120]}")
+        if base and shape(queries) != shape(base):
+            print(f"{name}: форма плана изменилась")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Снимки планов запросов по эндпоинтам на засеянной базе")
+    parser.add_argument("--snapshot", default="query_plans.json", help="Файл снимка планов")
+    parser.add_argument("--update", action="store_true", help="Перезаписать снимок текущими планами")
+    parser.add_argument("--min-rows", type=int, default=10_000, help="С какого размера таблица считается большой")
+    args = parser.parse_args()
+
+    plans, large = asyncio.run(capture(args.min_rows))
+    for name, queries in plans.items():
+        for statement, relation in sorted(seq_scans(queries, large)):
+            print(f"{name}: Seq Scan по {relation}")
+
+    if args.update:
+        with open(args.snapshot, "w") as f:
+            json.dump(plans, f, indent=2, ensure_ascii=False)
+        return
+    try:
+        with open(args.snapshot) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"Снимок {args.snapshot} не найден, запустите с --update")
+        sys.exit(1)
+    problems = compare(plans, baseline, large)
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+from sqlalchemy.orm import Session
+
+from app.core.tasks import task
+from app.db.dashboard import record_company_delta
+
+
+@task("company.delta")
+def company_delta(db: Session, company_id: str, **deltas):
+    record_company_delta(db, company_id, **deltas)
@@ -0,0 +1,106 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger("sql_profiler")
+
+current_profile: ContextVar[Optional["QueryProfile"]] = ContextVar("current_profile", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryProfile:
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+        self.slow_queries = []
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+        if duration * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            self.slow_queries.append({"statement": statement, "time_ms": round(duration * 1000, 2)})
+
+    def repeated(self):
+        # Один и тот же параметризованный запрос несколько раз за запрос - признак N+1
+        return {statement: count for statement, count in self.statements.items() if count > 1}
+
+    def header(self) -> str:
+        return f"count={self.count};time_ms={self.total_time * 1000:.2f};repeated={len(self.repeated())};slow={len(self.slow_queries)}"
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "time_ms": round(self.total_time * 1000, 2),
+            "repeated": self.repeated(),
+            "slow": self.slow_queries,
+        }
+
+
+def query_budget(max_queries: int):
+    def decorator(func):
+        func.query_budget = max_queries
+        return func
+    return decorator
+
+
+def instrument_engine(engine):
+    if not settings.SQL_PROFILER_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.profiler_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.record(statement, time.perf_counter() - context.profiler_query_start)
+
+
+class SQLProfilerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_PROFILER_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.SQL_PROFILER_DEBUG_HEADER:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-db-profile", profile.header().encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else scope["path"]
+            if profile.count:
+                logger.info(json.dumps({"method": scope["method"], "route": route_path, **profile.to_dict()},
+                                       ensure_ascii=False))
+
+        budget = getattr(scope.get("endpoint"), "query_budget", None)
+        if budget is not None and profile.count > budget:
+            message = f"{scope['method']} {route_path}: {profile.count} SQL statements, budget {budget}"
+            if settings.SQL_QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,30 @@
+from sqlalchemy import func, or_, literal
+
+from app.models.business_promo import PromoCode
+
+SEARCH_CONFIG = "simple"
+
+
+def search_condition(text: str):
+    # Каждое условие покрывается своим GIN-индексом, Postgres объединяет их через BitmapOr
+    query = literal(text)
+    return or_(
+        PromoCode.search_vector.op("@@")(func.websearch_to_tsquery(SEARCH_CONFIG, text)),
+        query.op("<%")(PromoCode.description),
+        query.op("<%")(PromoCode.company_name),
+    )
+
+
+def search_rank(text: str):
+    query = literal(text)
+    return func.greatest(
+        func.ts_rank_cd(PromoCode.search_vector, func.websearch_to_tsquery(SEARCH_CONFIG, text)),
+        func.word_similarity(query, PromoCode.description),
+        func.word_similarity(query, PromoCode.company_name),
+    )
+
+
+def search_promos(db, text: str):
+    return (db.query(PromoCode)
+            .filter(search_condition(text))
+            .order_by(search_rank(text).desc(), PromoCode.created.desc(), PromoCode.promo_id))
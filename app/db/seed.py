@@ -0,0 +1,199 @@
+import argparse
+import array
+import bisect
+import csv
+import io
+import itertools
+import json
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from app.core.password import hash_password
+from app.db.session import engine, init_db, copy_from
+from app.models.business_auth import Company
+from app.models.business_promo import PromoCode, PromoCodeStatistics, PromoActions, PromoComments
+from app.models.user_auth import User
+
+COUNTRIES = ["ru", "us", "gb", "de", "fr", "kz", "by", "tr", "cn", "in"]
+CATEGORIES = ["food", "travel", "tech", "sport", "books", "kids", "auto", "beauty", "home", "games"]
+BASE_DATE = date(2025, 1, 1)
+
+
+class IteratorFile(io.TextIOBase):
+    # COPY читает данные кусками через read(), строки генерируются лениво,
+    # поэтому память не зависит от объема набора
+    def __init__(self, rows):
+        self._lines = self._iter_lines(rows)
+        self._buffer = ""
+
+    @staticmethod
+    def _iter_lines(rows):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        for row in rows:
+            writer.writerow(row)
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            chunk, self._buffer = self._buffer, ""
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+class SkewedChoice:
+    # Распределение Ципфа: элемент ранга k выбирается с весом 1 / k^skew
+    def __init__(self, rng: random.Random, count: int, skew: float):
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1 / (rank ** skew) for rank in range(1, count + 1)))
+
+    def __call__(self) -> int:
+        return bisect.bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+def copy_rows(connection, model, columns, rows):
+    start = time.perf_counter()
+    cursor = connection.cursor()
+    table = model.__table__.name
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    copy_from(cursor, f'COPY "{table}" ({column_list}) FROM STDIN WITH (FORMAT csv)', IteratorFile(rows))
+    connection.commit()
+    print(f"{table}: {cursor.rowcount} rows in {time.perf_counter() - start:.1f}s")
+    cursor.close()
+
+
+def make_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def make_target(rng: random.Random):
+    target = {}
+    if rng.random() < 0.6:
+        target["age_from"] = rng.randint(0, 40)
+    if rng.random() < 0.6:
+        target["age_until"] = rng.randint(41, 100)
+    if rng.random() < 0.5:
+        target["country"] = rng.choice(COUNTRIES)
+    if rng.random() < 0.7:
+        target["categories"] = rng.sample(CATEGORIES, rng.randint(1, 3))
+    return target
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    users = int(args.users * args.scale)
+    companies = max(1, int(args.companies * args.scale))
+    promos = int(args.promos * args.scale)
+    likes = int(args.likes * args.scale)
+    comments = int(args.comments * args.scale)
+
+    init_db()
+    connection = engine.raw_connection()
+    if args.truncate:
+        cursor = connection.cursor()
+        tables = [model.__table__.name for model in
+                  (User, Company, PromoCode, PromoCodeStatistics, PromoActions, PromoComments)]
+        cursor.execute("TRUNCATE " + ", ".join(f'"{table}"' for table in tables))
+        connection.commit()
+        cursor.close()
+
+    # Один хеш на всех: bcrypt на миллионы строк занял бы часы
+    password = hash_password(args.password)
+    user_ids = [make_uuid(rng) for _ in range(users)]
+    company_ids = [make_uuid(rng) for _ in range(companies)]
+    promo_ids = [make_uuid(rng) for _ in range(promos)]
+
+    copy_rows(connection, User, ["user_id", "password", "name", "surname", "email", "avatar_url", "other"], (
+        (user_id, password, "Seed", f"User{i}", f"user{i}@seed.example.com", "https://cdn.seed.example.com/a.png",
+         json.dumps({"age": rng.randint(14, 90), "country": rng.choice(COUNTRIES)}))
+        for i, user_id in enumerate(user_ids)))
+    copy_rows(connection, Company, ["company_id", "name", "email", "password"], (
+        (company_id, f"Company {i}", f"company{i}@seed.example.com", password)
+        for i, company_id in enumerate(company_ids)))
+
+    # Сначала раскладываем лайки и комментарии по промокодам, чтобы счетчики в promo_code
+    # совпадали с promo_actions и promo_comments
+    pick_promo = SkewedChoice(rng, promos, args.skew)
+    pick_company = SkewedChoice(rng, companies, args.skew)
+    like_targets = array.array("l", (pick_promo() for _ in range(likes)))
+    comment_targets = array.array("l", (pick_promo() for _ in range(comments)))
+    like_count = [0] * promos
+    comment_count = [0] * promos
+    for index in like_targets:
+        like_count[index] += 1
+    for index in comment_targets:
+        comment_count[index] += 1
+    promo_company = [pick_company() for _ in range(promos)]
+    promo_target = [make_target(rng) for _ in range(promos)]
+
+    def promo_rows():
+        for i, promo_id in enumerate(promo_ids):
+            active_from = BASE_DATE + timedelta(days=rng.randint(0, 365))
+            active_until = active_from + timedelta(days=rng.randint(1, 365))
+            yield (promo_id, company_ids[promo_company[i]], f"Company {promo_company[i]}", like_count[i],
+                   comment_count[i], rng.randint(0, 100), "true" if rng.random() < 0.8 else "false", "COMMON",
+                   f"SEED{i:08d}", f"Seed promo number {i} for scale testing", "https://cdn.seed.example.com/p.png",
+                   json.dumps(promo_target[i]), rng.randint(1, 1000), active_from, active_until,
+                   active_from - timedelta(days=rng.randint(0, 30)))
+
+    copy_rows(connection, PromoCode,
+              ["promo_id", "company_id", "company_name", "like_count", "comment_count", "used_count", "active",
+               "mode", "promo_common", "description", "image_url", "target", "max_count", "active_from",
+               "active_until", "created"], promo_rows())
+    copy_rows(connection, PromoCodeStatistics, ["promo_id", "country", "activations_count"], (
+        (promo_id, promo_target[i].get("country", "UNKNOWN"), rng.randint(0, 100))
+        for i, promo_id in enumerate(promo_ids)))
+    copy_rows(connection, PromoActions, ["promo_id", "user_id", "is_activated_by_user", "is_liked_by_user"], (
+        (promo_ids[index], rng.choice(user_ids), "false", "true") for index in like_targets))
+
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def comment_rows():
+        for index in comment_targets:
+            user_number = rng.randrange(users)
+            yield (make_uuid(rng), promo_ids[index], user_ids[user_number], "Seed comment text for scale testing",
+                   (started + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))).isoformat(),
+                   json.dumps({"name": "Seed", "surname": f"User{user_number}",
+                               "avatar_url": "https://cdn.seed.example.com/a.png"}))
+
+    copy_rows(connection, PromoComments, ["comment_id", "promo_id", "user_id", "text", "comment_date", "author"],
+              comment_rows())
+
+    # Статистика ANALYZE пишется в транзакции: без commit close() откатил бы ее
+    cursor = connection.cursor()
+    cursor.execute("ANALYZE")
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Загрузка детерминированного синтетического набора данных через COPY")
+    parser.add_argument("--scale", type=float, default=1.0, help="Множитель для всех объемов")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--companies", type=int, default=2_000)
+    parser.add_argument("--promos", type=int, default=200_000)
+    parser.add_argument("--likes", type=int, default=5_000_000)
+    parser.add_argument("--comments", type=int, default=1_000_000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Параметр Ципфа для лайков, комментариев и компаний")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="HardPa$$w0rd!1")
+    parser.add_argument("--truncate", action="store_true", help="Очистить таблицы перед загрузкой")
+    seed(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
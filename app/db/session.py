@@ -1,26 +1,110 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
+from app.core import metrics
+from app.core.credentials import credential_hash
 from app.db.base import Base
+from app.db import profiler
 import redis
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True
-)
+
+def make_engine(database_url: str):
+    url = make_url(database_url)
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    if settings.DB_DRIVER == "psycopg":
+        url = url.set(drivername="postgresql+psycopg")
+        # Повторяющиеся запросы готовятся на сервере, parse/plan выполняется один раз на соединение
+        connect_args["prepare_threshold"] = settings.DB_PREPARE_THRESHOLD
+    return create_engine(
+        url,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args=connect_args,
+    )
+
+
+engine = make_engine(settings.DATABASE_URL)
+replica_engine = make_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else engine
 redis_host = os.environ.get('REDIS_HOST', 'localhost')
 redis_port = os.environ.get('REDIS_PORT', "6379")
 redis_client = redis.Redis(host=redis_host, port=redis_port, db=0)
+for instrumented_engine in {engine, replica_engine}:
+    metrics.instrument_engine(instrumented_engine)
+    profiler.instrument_engine(instrumented_engine)
+metrics.instrument_redis(redis_client)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def mark_session_wrote(session):
+    session.info["wrote"] = True
+
+
+def reset_pools():
+    # Соединения родительского процесса нельзя делить между воркерами:
+    # после fork каждый воркер открывает собственные пулы БД и Redis
+    engine.dispose(close=False)
+    replica_engine.dispose(close=False)
+    redis_client.connection_pool.reset()
+
+
+os.register_at_fork(after_in_child=reset_pools)
+
+
+def copy_from(cursor, sql: str, file):
+    if hasattr(cursor, "copy_expert"):
+        cursor.copy_expert(sql, file)
+        return
+    with cursor.copy(sql) as copy:
+        while data := file.read(65536):
+            copy.write(data)
+
 
 def init_db():
     Base.metadata.create_all(bind=engine)
 
-def get_db():
+def request_credential(request: Request):
+    return credential_hash(request.headers.get("authorization", ""))
+
+
+def get_db(request: Request):
     db = SessionLocal()
+    try:
+        yield db
+    finally:
+        # Следующие чтения этого пользователя пойдут в primary, пока реплика догоняет
+        if db.info.get("wrote") and replica_engine is not engine:
+            credential = request_credential(request)
+            if credential:
+                redis_client.setex(f"recent_write:{credential}", settings.REPLICA_STICKY_SECONDS, 1)
+        db.close()
+
+
+def get_read_db(request: Request):
+    db = None
+    if replica_engine is not engine:
+        credential = request_credential(request)
+        if not credential or not redis_client.exists(f"recent_write:{credential}"):
+            db = ReadSessionLocal()
+            try:
+                db.connection()
+            except OperationalError:
+                db.close()
+                db = None
+    if db is None:
+        db = SessionLocal()
     try:
         yield db
     finally:
@@ -1,3 +1,4 @@
 from .user_auth import User
 from .business_auth import Company
-from .business_promo import PromoCode
+from .business_promo import PromoCode, PromoUniqueCode, CompanyStats, CompanyDailyStats, CompanyCountryStats
+from .tasks import ProcessedTask
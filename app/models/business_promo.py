@@ -4,7 +4,10 @@ from datetime import datetime, timezone, date
 from typing import List, Optional
 
 import pycountry
-from sqlalchemy import Column, VARCHAR, UUID, Enum, JSON, Integer, Date, Boolean, String, DateTime
+from sqlalchemy import Column, VARCHAR, UUID, Enum, JSON, Integer, Date, Boolean, String, DateTime, UniqueConstraint, \
+    Index, Computed, DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 
 from app.db.base import Base
 from pydantic import BaseModel, Field, field_validator, HttpUrl, model_validator, StrictStr, StrictInt
@@ -16,6 +19,7 @@ class UrlModel(BaseModel):
 
 class PromoActions(Base):
     __tablename__ = 'promo_actions'
+    __table_args__ = (Index('ix_promo_actions_user_id_promo_id', 'user_id', 'promo_id'),)
 
     action_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     promo_id = Column(UUID(as_uuid=True), nullable=False, unique=False)
@@ -26,6 +30,8 @@ class PromoActions(Base):
 
 class PromoComments(Base):
     __tablename__ = 'promo_comments'
+    __table_args__ = (Index('ix_promo_comments_promo_id_date_id', 'promo_id', 'comment_date', 'comment_id'),)
+
     comment_id = Column(UUID(as_uuid=True), primary_key=True, unique=True, nullable=False, default=uuid.uuid4)
     promo_id = Column(UUID(as_uuid=True), nullable=False, unique=False)
     user_id = Column(UUID(as_uuid=True), nullable=False, unique=False)
@@ -38,6 +44,10 @@ class PromoCommentBase(BaseModel):
     text: str = Field(..., min_length=10, max_length=1000)
 
 
+class PromoBatchLookup(BaseModel):
+    ids: List[StrictStr] = Field(..., min_length=1, max_length=100)
+
+
 class PromoCodeStatistics(Base):
     __tablename__ = 'promo_code_statistics'
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -46,6 +56,45 @@ class PromoCodeStatistics(Base):
     activations_count = Column(Integer, default=0)
 
 
+class CompanyStats(Base):
+    __tablename__ = 'company_stats'
+
+    company_id = Column(UUID(as_uuid=True), primary_key=True, nullable=False)
+    promo_count = Column(Integer, nullable=False, default=0)
+    like_count = Column(Integer, nullable=False, default=0)
+    comment_count = Column(Integer, nullable=False, default=0)
+    activations_count = Column(Integer, nullable=False, default=0)
+
+
+class CompanyDailyStats(Base):
+    __tablename__ = 'company_daily_stats'
+
+    company_id = Column(UUID(as_uuid=True), primary_key=True, nullable=False)
+    day = Column(Date, primary_key=True, nullable=False)
+    promo_count = Column(Integer, nullable=False, default=0)
+    like_count = Column(Integer, nullable=False, default=0)
+    comment_count = Column(Integer, nullable=False, default=0)
+    activations_count = Column(Integer, nullable=False, default=0)
+
+
+class CompanyCountryStats(Base):
+    __tablename__ = 'company_country_stats'
+
+    company_id = Column(UUID(as_uuid=True), primary_key=True, nullable=False)
+    country = Column(String, primary_key=True, nullable=False)
+    activations_count = Column(Integer, nullable=False, default=0)
+
+
+class PromoUniqueCode(Base):
+    __tablename__ = 'promo_unique_code'
+    __table_args__ = (UniqueConstraint('promo_id', 'code', name='uq_promo_unique_code_promo_id_code'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    promo_id = Column(UUID(as_uuid=True), nullable=False, unique=False)
+    code = Column(VARCHAR(30), nullable=False)
+    issued = Column(Boolean, nullable=False, default=False)
+
+
 class PromoMode(str, enum.Enum):
     COMMON = "COMMON"
     UNIQUE = "UNIQUE"
@@ -53,6 +102,13 @@ class PromoMode(str, enum.Enum):
 
 class PromoCode(Base):
     __tablename__ = "promo_code"
+    __table_args__ = (
+        Index('ix_promo_code_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_promo_code_description_trgm', 'description', postgresql_using='gin',
+              postgresql_ops={'description': 'gin_trgm_ops'}),
+        Index('ix_promo_code_company_name_trgm', 'company_name', postgresql_using='gin',
+              postgresql_ops={'company_name': 'gin_trgm_ops'}),
+    )
 
     promo_id = Column(UUID(as_uuid=True), primary_key=True, unique=True, nullable=False, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), nullable=False, unique=False)
@@ -71,6 +127,9 @@ class PromoCode(Base):
     active_from = Column(Date, nullable=True)
     active_until = Column(Date, nullable=True)
     created = Column(Date, nullable=False, default=date.today())
+    # Конфигурация 'simple' без стемминга: в описаниях смешаны языки, опечатки и словоформы ловит pg_trgm
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "to_tsvector('simple', coalesce(company_name, '') || ' ' || coalesce(description, ''))", persisted=True)))
 
     def to_dict(self):
         new_dict = {
@@ -94,6 +153,9 @@ class PromoCode(Base):
         return new_dict
 
 
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
 class Target(BaseModel):
     age_from: Optional[StrictInt] = Field(default=None, ge=0, le=100)
     age_until: Optional[StrictInt] = Field(default=None, ge=0, le=100)
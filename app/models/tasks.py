@@ -0,0 +1,13 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, VARCHAR, DateTime
+
+from app.db.base import Base
+
+
+class ProcessedTask(Base):
+    __tablename__ = 'processed_task'
+
+    task_id = Column(VARCHAR(36), primary_key=True, nullable=False)
+    name = Column(VARCHAR, nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
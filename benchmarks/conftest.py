@@ -0,0 +1,86 @@
+import random
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from app.core import token
+from app.core.password import hash_password
+from app.models.business_promo import PromoCode, PromoMode
+from app.models.user_auth import User
+
+COUNTRIES = ["ru", "us", "gb", "de", "fr", "kz", "by"]
+CATEGORIES = ["food", "travel", "tech", "sport", "books", "kids", "auto"]
+SIZES = [10, 1000, 10000]
+
+
+def make_target(rng: random.Random):
+    target = {}
+    if rng.random() < 0.6:
+        target["age_from"] = rng.randint(0, 40)
+    if rng.random() < 0.6:
+        target["age_until"] = rng.randint(41, 100)
+    if rng.random() < 0.5:
+        target["country"] = rng.choice(COUNTRIES)
+    if rng.random() < 0.7:
+        target["categories"] = rng.sample(CATEGORIES, rng.randint(1, 3))
+    return target
+
+
+def make_promos(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    company_id = uuid.UUID(int=rng.getrandbits(128))
+    promos = []
+    for i in range(count):
+        promos.append(PromoCode(
+            promo_id=uuid.UUID(int=rng.getrandbits(128)),
+            company_id=company_id,
+            company_name="Benchmark Company",
+            like_count=rng.randint(0, 1000),
+            comment_count=rng.randint(0, 100),
+            used_count=rng.randint(0, 100),
+            active=rng.random() < 0.8,
+            mode=PromoMode.COMMON,
+            promo_common=f"PROMO{i:06d}",
+            description=f"Benchmark promo number {i}",
+            image_url="https://cdn.example.com/promo.png",
+            target=make_target(rng),
+            max_count=100,
+            active_from=date(2025, 1, 1),
+            active_until=date(2025, 1, 1) + timedelta(days=rng.randint(1, 365)),
+            created=date(2025, 1, 1),
+        ))
+    return promos
+
+
+def make_user(seed: int = 42):
+    rng = random.Random(seed)
+    return User(
+        user_id=uuid.UUID(int=rng.getrandbits(128)),
+        password="$2b$12$" + "a" * 53,
+        name="Bench",
+        surname="Mark",
+        email="bench@example.com",
+        avatar_url="https://cdn.example.com/avatar.png",
+        other={"age": 25, "country": "ru"},
+    )
+
+
+@pytest.fixture(scope="session")
+def user():
+    return make_user()
+
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda size: f"n={size}")
+def promos(request):
+    return make_promos(request.param)
+
+
+@pytest.fixture(scope="session")
+def user_token(user):
+    return token.generate_user_token(user)
+
+
+@pytest.fixture(scope="session")
+def password_hash():
+    return hash_password("HardPa$$w0rd!1")
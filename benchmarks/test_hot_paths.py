@@ -0,0 +1,79 @@
+import pytest
+
+from app.api.user_promo import iter_promos_for_user, delete_none
+from app.core import token
+from app.core.password import verify_password
+from app.models.business_promo import Target, PromoCodeCreate
+from app.models.user_auth import UserBase
+
+
+def test_feed_targeting(benchmark, promos, user):
+    benchmark(lambda: list(iter_promos_for_user(promos, user.other)))
+
+
+def test_feed_targeting_with_category(benchmark, promos, user):
+    benchmark(lambda: list(iter_promos_for_user(promos, user.other, "tech")))
+
+
+def test_promo_to_dict(benchmark, promos):
+    benchmark(lambda: [promo.to_dict() for promo in promos])
+
+
+def test_user_to_dict(benchmark, user):
+    benchmark(user.to_dict)
+
+
+def test_delete_none(benchmark):
+    card = {
+        "promo_id": "5b9b7c1e-0c2f-4f44-9f7a-3f8e4f0c8c11",
+        "company_name": "Benchmark Company",
+        "description": "Benchmark promo",
+        "image_url": None,
+        "active": True,
+        "like_count": 10,
+        "comment_count": "None",
+    }
+    benchmark(delete_none, card)
+
+
+def test_decode_token(benchmark, user_token):
+    benchmark(token.decode_token, user_token)
+
+
+def test_get_token_info(benchmark, user_token):
+    benchmark(token.get_token_info, user_token, "_id")
+
+
+def test_validate_target(benchmark, promos):
+    targets = [promo.target for promo in promos]
+    benchmark(lambda: [Target.model_validate(target) for target in targets])
+
+
+def test_validate_user_base(benchmark):
+    payload = {
+        "name": "Bench",
+        "surname": "Mark",
+        "email": "bench@example.com",
+        "password": "HardPa$$w0rd!1",
+        "avatar_url": "https://cdn.example.com/avatar.png",
+        "other": {"age": 25, "country": "ru"},
+    }
+    benchmark(UserBase.model_validate, payload)
+
+
+@pytest.mark.parametrize("unique_codes", [1, 100, 5000], ids=lambda n: f"codes={n}")
+def test_validate_promo_code_create(benchmark, unique_codes):
+    payload = {
+        "description": "Benchmark promo code",
+        "image_url": "https://cdn.example.com/promo.png",
+        "target": {"age_from": 18, "age_until": 60, "country": "ru", "categories": ["tech", "food"]},
+        "max_count": 1,
+        "mode": "UNIQUE",
+        "promo_unique": [f"CODE{i:06d}" for i in range(unique_codes)],
+    }
+    benchmark(PromoCodeCreate.model_validate, payload)
+
+
+def test_verify_password(benchmark, password_hash):
+    # bcrypt медленный намеренно, несколько раундов достаточно для сравнения
+    benchmark.pedantic(verify_password, args=("HardPa$$w0rd!1", password_hash), rounds=5, iterations=1)
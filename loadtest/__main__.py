@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+
+import httpx
+
+from loadtest import antifraud_stub, scenarios
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, method, url, name=None, **kwargs):
+        name = name or f"{method} {url}"
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 500:
+            self.errors[name] += 1
+        return response
+
+    def report(self, duration: float):
+        report = {}
+        for name, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            report[name] = {
+                "count": len(samples),
+                "errors": self.errors[name],
+                "rps": round(len(samples) / duration, 2),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            }
+        return report
+
+
+def percentile(samples, p):
+    index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+async def virtual_user(client, recorder, state, deadline):
+    functions, weights = zip(*scenarios.SCENARIOS)
+    while time.perf_counter() < deadline:
+        scenario = random.choices(functions, weights)[0]
+        await scenario(client, recorder, state)
+
+
+async def make_client(args, stack: AsyncExitStack):
+    if args.url:
+        return await stack.enter_async_context(httpx.AsyncClient(base_url=args.url, timeout=30))
+    # Приложение читает адрес антифрода из окружения
+    os.environ["ANTIFRAUD_ADDRESS"] = args.antifraud_address
+    from main import app
+    from app.db.session import init_db
+    init_db()
+    # ASGITransport не шлет lifespan-события: без них не стартуют воркер задач и слушатель инвалидации кеша
+    await stack.enter_async_context(app.router.lifespan_context(app))
+    return await stack.enter_async_context(
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=30))
+
+
+def compare(report, baseline, threshold):
+    regressions = []
+    for name, stats in report.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[key] and stats[key] > base[key] * (1 + threshold):
+                regressions.append(f"{name} {key}: {base[key]} -> {stats[key]}")
+        if base["rps"] and stats["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name} rps: {base['rps']} -> {stats['rps']}")
+    return regressions
+
+
+async def run(args):
+    random.seed(args.seed)
+    if args.antifraud_stub:
+        antifraud_stub.start(args.antifraud_address, args.antifraud_latency_ms)
+
+    state = scenarios.State()
+    async with AsyncExitStack() as stack:
+        client = await make_client(args, stack)
+        await scenarios.setup(client, Recorder(), state, args.companies, args.promos, args.users)
+        recorder = Recorder()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(virtual_user(client, recorder, state, deadline) for _ in range(args.concurrency)))
+        return recorder.report(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон смешанных сценариев API")
+    parser.add_argument("--url", help="Адрес запущенного сервиса; без него приложение гоняется in-process через ASGI")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--promos", type=int, default=50, help="Промокодов на компанию")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--antifraud-stub", action="store_true", help="Поднять заглушку антифрода")
+    parser.add_argument("--antifraud-address", default="localhost:9090")
+    parser.add_argument("--antifraud-latency-ms", type=float, default=20)
+    parser.add_argument("--save-baseline", help="Сохранить отчет как baseline в файл")
+    parser.add_argument("--baseline", help="Сравнить с baseline из файла")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимая деградация, доля")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"{'endpoint':45} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, stats in report.items():
+        print(f"{name:45} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>8} "
+              f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print("Регрессии относительно baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+from fastapi import FastAPI
+
+
+def create_app(latency_ms: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/validate")
+    async def validate(payload: dict):
+        await asyncio.sleep(latency_ms / 1000)
+        cache_until = datetime.now(timezone.utc) + timedelta(minutes=5)
+        return {"ok": True, "cache_until": cache_until.isoformat()}
+
+    return app
+
+
+def start(address: str, latency_ms: float) -> uvicorn.Server:
+    host, port = address.split(":")
+    server = uvicorn.Server(uvicorn.Config(create_app(latency_ms), host=host, port=int(port), log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    return server
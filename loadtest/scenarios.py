@@ -0,0 +1,121 @@
+import random
+import uuid
+
+PASSWORD = "HardPa$$w0rd!1"
+COUNTRIES = ["ru", "us", "gb", "de", "fr"]
+CATEGORIES = ["food", "travel", "tech", "sport", "books"]
+
+
+class State:
+    def __init__(self):
+        self.companies = []
+        self.users = []
+        self.promo_ids = []
+
+
+def user_payload():
+    return {
+        "name": "Load",
+        "surname": "Test",
+        "email": f"user-{uuid.uuid4().hex[:12]}@loadtest.com",
+        "password": PASSWORD,
+        "avatar_url": "https://cdn.loadtest.com/avatar.png",
+        "other": {"age": random.randint(14, 80), "country": random.choice(COUNTRIES)},
+    }
+
+
+def promo_payload():
+    target = {"age_from": random.randint(10, 30), "age_until": random.randint(40, 90)}
+    if random.random() < 0.5:
+        target["country"] = random.choice(COUNTRIES)
+    if random.random() < 0.7:
+        target["categories"] = random.sample(CATEGORIES, 2)
+    return {
+        "description": f"Load test promo {uuid.uuid4().hex[:8]}",
+        "image_url": "https://cdn.loadtest.com/promo.png",
+        "target": target,
+        "max_count": 100,
+        "mode": "COMMON",
+        "promo_common": f"LOAD{uuid.uuid4().hex[:8]}",
+    }
+
+
+async def setup(client, recorder, state: State, companies: int, promos_per_company: int, users: int):
+    for _ in range(companies):
+        payload = {"name": "Load Company", "email": f"company-{uuid.uuid4().hex[:12]}@loadtest.com",
+                   "password": PASSWORD}
+        response = await recorder.call(client, "POST", "/api/business/auth/sign-up", json=payload)
+        token = response.json()["token"]
+        state.companies.append(token)
+        response = await recorder.call(client, "POST", "/api/business/promo/batch",
+                                       json=[promo_payload() for _ in range(promos_per_company)],
+                                       headers=auth(token))
+        state.promo_ids.extend(item["id"] for item in response.json() if "id" in item)
+    for _ in range(users):
+        response = await recorder.call(client, "POST", "/api/user/auth/sign-up", json=user_payload())
+        state.users.append(response.json()["token"])
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def sign_up_sign_in(client, recorder, state):
+    payload = user_payload()
+    await recorder.call(client, "POST", "/api/user/auth/sign-up", json=payload)
+    await recorder.call(client, "POST", "/api/user/auth/sign-in",
+                        json={"email": payload["email"], "password": payload["password"]})
+
+
+async def browse_feed(client, recorder, state):
+    params = {"limit": 10, "offset": random.choice([0, 10, 20])}
+    if random.random() < 0.3:
+        params["category"] = random.choice(CATEGORIES)
+    await recorder.call(client, "GET", "/api/user/feed", params=params,
+                        headers=auth(random.choice(state.users)), name="GET /api/user/feed")
+
+
+async def view_promo(client, recorder, state):
+    promo_id = random.choice(state.promo_ids)
+    await recorder.call(client, "GET", f"/api/user/promo/{promo_id}",
+                        headers=auth(random.choice(state.users)), name="GET /api/user/promo/{id}")
+
+
+async def like(client, recorder, state):
+    promo_id = random.choice(state.promo_ids)
+    method = random.choice(["POST", "DELETE"])
+    await recorder.call(client, method, f"/api/user/promo/{promo_id}/like",
+                        headers=auth(random.choice(state.users)), name=f"{method} /api/user/promo/{{id}}/like")
+
+
+async def comment(client, recorder, state):
+    promo_id = random.choice(state.promo_ids)
+    headers = auth(random.choice(state.users))
+    await recorder.call(client, "POST", f"/api/user/promo/{promo_id}/comments",
+                        json={"text": "Load test comment text"}, headers=headers,
+                        name="POST /api/user/promo/{id}/comments")
+    await recorder.call(client, "GET", f"/api/user/promo/{promo_id}/comments", params={"limit": 10},
+                        headers=headers, name="GET /api/user/promo/{id}/comments")
+
+
+async def activate(client, recorder, state):
+    promo_id = random.choice(state.promo_ids)
+    await recorder.call(client, "POST", f"/api/user/promo/{promo_id}/activate",
+                        headers=auth(random.choice(state.users)), name="POST /api/user/promo/{id}/activate")
+
+
+async def business_listing(client, recorder, state):
+    await recorder.call(client, "GET", "/api/business/promo", params={"limit": 10, "sort_by": "active_from"},
+                        headers=auth(random.choice(state.companies)), name="GET /api/business/promo")
+
+
+# Вес сценария - относительная частота в смешанной нагрузке
+SCENARIOS = [
+    (sign_up_sign_in, 1),
+    (browse_feed, 10),
+    (view_promo, 8),
+    (like, 4),
+    (comment, 3),
+    (activate, 2),
+    (business_listing, 2),
+]
@@ -1,21 +1,73 @@
 import os
 from fastapi import FastAPI, Request
 import uvicorn
+from brotli_asgi import BrotliMiddleware
 from fastapi.exceptions import RequestValidationError, HTTPException
 from fastapi.responses import JSONResponse
 from starlette import status
 
-from app.api import ping, business_auth, business_promo, user_auth, profile, user_promo
+from app.api import ping, business_auth, business_promo, user_auth, profile, user_promo, metrics, debug, realtime
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.admission import AdmissionControlMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.config import settings
 from app.db.session import init_db
+from app.core.cache import start_invalidation_listener, stop_invalidation_listener
+from app.core.realtime import hub
+from app.core.tasks import worker
+from app.db.profiler import SQLProfilerMiddleware
 
 
 app = FastAPI()
+app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE, gzip_fallback=True)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(SQLProfilerMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(ping.router, prefix='/api')
+app.include_router(metrics.router, prefix='/api')
+app.include_router(debug.router, prefix='/api')
 app.include_router(business_auth.router, prefix='/api/business')
 app.include_router(business_promo.router, prefix='/api/business')
 app.include_router(user_auth.router, prefix='/api/user')
 app.include_router(profile.router, prefix='/api/user')
 app.include_router(user_promo.router, prefix='/api/user')
+app.include_router(realtime.router, prefix='/api/user')
+
+
+@app.on_event("startup")
+def start_cache_invalidation():
+    start_invalidation_listener()
+
+
+@app.on_event("startup")
+async def start_realtime_hub():
+    hub.start()
+
+
+@app.on_event("startup")
+async def start_task_worker():
+    if settings.TASKS_WORKER_INPROCESS:
+        worker.start()
+
+
+@app.on_event("shutdown")
+def stop_cache_invalidation():
+    stop_invalidation_listener()
+
+
+@app.on_event("shutdown")
+async def stop_realtime_hub():
+    await hub.stop()
+
+
+@app.on_event("shutdown")
+async def stop_task_worker():
+    await worker.stop()
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = []
@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+import uvicorn
+
+from app.core.config import settings
+from app.db.session import init_db, engine
+
+
+if __name__ == "__main__":
+    if settings.WORKERS > 1:
+        # Метрики воркеров собираются через общий каталог prometheus_client
+        os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="prometheus_"))
+    init_db()
+    # Воркеры создают свои пулы соединений, родителю свои не нужны
+    engine.dispose()
+    host, port = settings.SERVER_ADDRESS.split(":")
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=int(port),
+        workers=settings.WORKERS,
+        loop=settings.LOOP,
+        http=settings.HTTP,
+        backlog=settings.BACKLOG,
+        timeout_keep_alive=settings.TIMEOUT_KEEP_ALIVE,
+        timeout_graceful_shutdown=settings.TIMEOUT_GRACEFUL_SHUTDOWN,
+    )
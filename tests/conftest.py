@@ -0,0 +1,86 @@
+import os
+import uuid
+from datetime import date
+
+import pytest
+
+# Интеграционные тесты идут против настоящих Postgres и Redis: адрес базы задается через
+# TEST_DATABASE_URL, без него тесты, которым нужна база, пропускаются
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL не задан")
+    from main import app
+    from app.db.session import init_db
+    init_db()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+    # Без with: lifespan-хуки (воркер задач, хаб, слушатель кеша) в тестах не нужны
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def db(app):
+    from app.db.session import SessionLocal
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user_headers(db):
+    from app.core import token
+    from app.db.session import redis_client
+    from app.models.user_auth import User
+
+    user = User(
+        user_id=uuid.uuid4(),
+        password="$2b$12$" + "a" * 53,
+        name="Test",
+        surname="User",
+        email=f"{uuid.uuid4().hex}@example.com",
+        avatar_url="https://cdn.example.com/avatar.png",
+        other={"age": 25, "country": "ru"},
+    )
+    db.add(user)
+    db.commit()
+    user_token = token.generate_user_token(user)
+    redis_client.setex(f"user_token:{user.user_id}", 3600, user_token)
+    return {"Authorization": f"Bearer {user_token}"}
+
+
+@pytest.fixture
+def promo(db):
+    from app.models.business_promo import PromoCode, PromoMode
+
+    promo = PromoCode(
+        promo_id=uuid.uuid4(),
+        company_id=uuid.uuid4(),
+        company_name="Test Company",
+        like_count=0,
+        comment_count=0,
+        used_count=0,
+        active=True,
+        mode=PromoMode.COMMON,
+        promo_common="TESTPROMO",
+        description="Test promo for integration tests",
+        image_url="https://cdn.example.com/promo.png",
+        target={},
+        max_count=100,
+        active_from=date(2025, 1, 1),
+        active_until=date(2099, 1, 1),
+        created=date.today(),
+    )
+    db.add(promo)
+    db.commit()
+    return promo
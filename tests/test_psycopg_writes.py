@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("psycopg")
+
+
+@pytest.fixture
+def psycopg_db(app, monkeypatch):
+    from app.core.config import settings
+    from app.db import profiler
+    from app.db.session import get_db, make_engine
+
+    monkeypatch.setattr(settings, "DB_DRIVER", "psycopg")
+    engine = make_engine(settings.DATABASE_URL)
+    profiler.instrument_engine(engine)
+    PsycopgSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_psycopg_db():
+        db = PsycopgSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_psycopg_db
+    yield
+    engine.dispose()
+
+
+def test_like_dislike_comment_on_psycopg(client, psycopg_db, user_headers, promo, db):
+    from app.models.business_promo import PromoCode
+
+    # Больше DB_PREPARE_THRESHOLD повторов: запросы успевают стать серверными prepared statements
+    for _ in range(6):
+        response = client.post(f"/api/user/promo/{promo.promo_id}/like", headers=user_headers)
+        assert response.status_code == 200, response.text
+        response = client.delete(f"/api/user/promo/{promo.promo_id}/like", headers=user_headers)
+        assert response.status_code == 200, response.text
+    response = client.post(f"/api/user/promo/{promo.promo_id}/like", headers=user_headers)
+    assert response.status_code == 200, response.text
+
+    response = client.post(f"/api/user/promo/{promo.promo_id}/comments", headers=user_headers,
+                           json={"text": "Отличный промокод, спасибо!"})
+    assert response.status_code == 201, response.text
+
+    db.expire_all()
+    stored = db.query(PromoCode).get(promo.promo_id)
+    assert stored.like_count == 1
+    assert stored.comment_count == 1
@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.fixture
+def strict_budget(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SQL_PROFILER_ENABLED", True)
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET_STRICT", True)
+
+
+def test_writes_fit_query_budget(client, strict_budget, user_headers, promo):
+    # В строгом режиме превышение бюджета поднимает QueryBudgetExceeded, и TestClient пробрасывает его в тест
+    response = client.post(f"/api/user/promo/{promo.promo_id}/like", headers=user_headers)
+    assert response.status_code == 200, response.text
+    response = client.delete(f"/api/user/promo/{promo.promo_id}/like", headers=user_headers)
+    assert response.status_code == 200, response.text
+    response = client.post(f"/api/user/promo/{promo.promo_id}/comments", headers=user_headers,
+                           json={"text": "Отличный промокод, спасибо!"})
+    assert response.status_code == 201, response.text
+
+
+def test_budget_exceeded_fails_request(client, strict_budget, user_headers, promo, monkeypatch):
+    from app.api.user_promo import like_promo
+    from app.db.profiler import QueryBudgetExceeded
+
+    monkeypatch.setattr(like_promo, "query_budget", 1)
+    with pytest.raises(QueryBudgetExceeded):
+        client.post(f"/api/user/promo/{promo.promo_id}/like", headers=user_headers)
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_waiter_survives_leader_cancellation():
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(None)
+        release.wait(5)
+        return len(calls)
+
+    async def scenario():
+        flight = SingleFlight(0)
+        leader = asyncio.create_task(flight.do("key", load))
+        while not calls:
+            await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        return await asyncio.wait_for(waiter, 5)
+
+    # Ожидающий не получает CancelledError лидера, а сам становится лидером и загружает заново
+    assert asyncio.run(scenario()) == 2
+
+
+def test_waiters_share_leader_error():
+    release = threading.Event()
+
+    def load():
+        release.wait(5)
+        raise ValueError("boom")
+
+    async def scenario():
+        flight = SingleFlight(0)
+        leader = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(leader, waiter, return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(scenario())] == [ValueError, ValueError]